@@ -0,0 +1,56 @@
+"""Memory and hashing cost of the AST.
+
+Parses the generated large_source workload and reports the memory held
+by the resulting tree, plus the cost of hashing a node at the top of a
+deeply nested expression (what a node-keyed cache pays per lookup).
+
+    python -m benchmarks.micro.ast_memory
+"""
+import gc
+import tracemalloc
+from timeit import Timer
+
+from src.asts.syntax_trees import Binary, Literal
+from src.bench import large_source
+from src.lexer.regex_scanner import RegexScanner
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.parser.rec_des_parser import Parser
+
+COPIES = 2
+NESTING = 200
+NUMBER = 10_000
+
+
+def count_nodes(node) -> int:
+    if isinstance(node, list):
+        return sum(count_nodes(item) for item in node)
+    if not hasattr(node, "__dataclass_fields__"):
+        return 0
+
+    return 1 + sum(count_nodes(getattr(node, name)) for name in node.__dataclass_fields__)
+
+
+def main():
+    source = large_source() * COPIES
+    tokens = RegexScanner(source).scan_tokens()
+
+    gc.collect()
+    tracemalloc.start()
+    statements = Parser(iter(tokens)).parse()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = count_nodes(statements)
+    print(f"nodes: {nodes}, AST memory: {size / (1024 * 1024):.2f} MiB, {size / nodes:.1f} bytes/node")
+
+    expr = Literal(1.0)
+    for _ in range(NESTING):
+        expr = Binary(expr, Token(TokenType.PLUS, "+", None, 1), Literal(1.0))
+
+    elapsed = min(Timer("hash(expr)", globals={"expr": expr}).repeat(repeat=5, number=NUMBER))
+    print(f"hash of a node nesting {NESTING} levels: {elapsed / NUMBER * 1e9:.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
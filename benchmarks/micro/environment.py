@@ -0,0 +1,102 @@
+"""Allocation and lookup cost of local scope frames.
+
+Compares the original dict-per-scope environment, addressed by name,
+with the slot-indexed frames the resolver now assigns, and times the
+tree walker end to end on a loop of calls to a two-parameter function,
+where a frame is allocated per call.
+
+    python -m benchmarks.micro.environment
+"""
+import contextlib
+import io
+import tracemalloc
+from timeit import Timer
+
+from src.common.environment import Environment
+from src.lox import run
+from src.parser.interpreter import Interpreter
+
+NUMBER = 200_000
+CALLS = 20_000
+CALL_LOOP = f"""
+fun add(a, b) {{ var c = a + b; return c; }}
+var i = 0;
+while (i < {CALLS}) {{ add(i, 1); i = i + 1; }}
+"""
+
+
+class DictEnvironment:
+    """The environment as it was before slots: one dict per scope."""
+
+    def __init__(self, encl=None):
+        self.values = dict()
+        self.enclosing = encl
+
+    def define(self, name, value):
+        self.values[name] = value
+
+    def ancestor(self, distance):
+        env = self
+        for _ in range(distance):
+            env = env.enclosing
+
+        return env
+
+    def get_at(self, distance, name):
+        return self.ancestor(distance).values.get(name)
+
+
+def per_op_ns(stmt: str, namespace: dict, number: int = NUMBER) -> float:
+    timer = Timer(stmt, globals=namespace)
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def bytes_per_frame(factory) -> float:
+    tracemalloc.start()
+    frames = [factory() for _ in range(10_000)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(frames)
+
+
+def main():
+    args = [1.0, 2.0]
+    namespace = {
+        "dict_env": DictEnvironment(DictEnvironment()),
+        "slot_env": Environment(Environment(None, [None, None]), [None, None]),
+    }
+    namespace["dict_env"].enclosing.define("n", 1.0)
+    namespace["slot_env"].enclosing.define(1, 1.0)
+
+    def dict_frame():
+        env = DictEnvironment()
+        env.define("a", args[0])
+        env.define("b", args[1])
+        return env
+
+    def slot_frame():
+        return Environment(None, list(args))
+
+    namespace.update(dict_frame=dict_frame, slot_frame=slot_frame)
+
+    rows = [
+        ("frame alloc + bind (ns)", per_op_ns("dict_frame()", namespace), per_op_ns("slot_frame()", namespace)),
+        ("frame size (bytes)", bytes_per_frame(dict_frame), bytes_per_frame(slot_frame)),
+        ("get_at(1, ...) (ns)", per_op_ns("dict_env.get_at(1, 'n')", namespace),
+         per_op_ns("slot_env.get_at(1, 1)", namespace)),
+    ]
+
+    print(f"{'operation':<28}{'dict':>12}{'slots':>12}")
+    for name, legacy, slots in rows:
+        print(f"{name:<28}{legacy:>12.1f}{slots:>12.1f}")
+
+    def call_loop():
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(CALL_LOOP, Interpreter())
+
+    elapsed = min(Timer(call_loop).repeat(repeat=5, number=3)) / 3
+    print(f"\ncall loop: {elapsed / CALLS * 1e9:.0f} ns per iteration with a call")
+
+
+if __name__ == "__main__":
+    main()
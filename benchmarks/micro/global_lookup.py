@@ -0,0 +1,83 @@
+"""Cost of evaluating a global `Variable` in the tree walker.
+
+Globals used to be found by name on every read, an exception-guarded
+dict lookup behind a method call. Each `Variable` site now caches the
+global's cell and only checks that the globals' version hasn't changed,
+which leaves it close to reading a slot attribute.
+
+    python -m benchmarks.micro.global_lookup
+"""
+from timeit import Timer
+
+from src.asts.syntax_trees import Variable
+from src.common.environment import GlobalCell
+from src.common.visitor import visitor
+from src.error_handler import LoxRuntimeError
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.parser.interpreter import Interpreter
+
+NUMBER = 200_000
+
+
+class NamedGlobals:
+    """The global environment as it was before cells."""
+
+    def __init__(self):
+        self.values = dict()
+
+    def define(self, name, value):
+        self.values[name] = value
+
+    def get(self, name):
+        try:
+            return self.values[name.lexeme]
+        except KeyError:
+            raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.") from None
+
+
+class NamedLookup(Interpreter):
+    """The interpreter's variable lookup as it was before cells."""
+
+    def __init__(self):
+        super().__init__()
+        self.globals = NamedGlobals()
+
+    @visitor(Variable)
+    def visit(self, expr: Variable):
+        return self.look_up_variable(expr.name, expr)
+
+    def look_up_variable(self, name, expr):
+        distance = expr.depth
+        if distance is not None:
+            return self.environment.get_at(distance, expr.slot)
+        else:
+            return self.globals.get(name)
+
+
+def per_lookup_ns(stmt: str, namespace: dict) -> float:
+    timer = Timer(stmt, globals=namespace)
+    return min(timer.repeat(repeat=5, number=NUMBER)) / NUMBER * 1e9
+
+
+def main():
+    name = Token(TokenType.IDENTIFIER, "fib", None, 1)
+    expr = Variable(name)
+
+    named = NamedLookup()
+    named.globals.define(name.lexeme, 1.0)
+    interp = Interpreter()
+    interp.globals.define(name.lexeme, 1.0)
+
+    namespace = {"named": named, "interp": interp, "name": name, "expr": expr, "cell": GlobalCell(1.0)}
+    print(f"{'lookup':<24}{'ns':>8}")
+    for label, stmt in (
+            ("by name", "named.visit(expr)"),
+            ("cached cell", "interp.visit(expr)"),
+            ("slot attribute", "cell.value"),
+    ):
+        print(f"{label:<24}{per_lookup_ns(stmt, namespace):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Cost of `import` for a large library, in the tree walker.
+
+The first import in a process parses, resolves and runs the module; with
+the program cache on disk the front end is skipped. Any later import of
+the same file only stats it and binds the importer's globals to the
+module's cells.
+
+    python -m benchmarks.micro.import_cost
+"""
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from timeit import Timer
+
+from src.asts.syntax_trees import Import
+from src.bench import large_source
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.modules import ModuleCache
+from src.parser.interpreter import Interpreter
+
+NUMBER = 2_000
+
+
+def import_statement(name: str) -> Import:
+    return Import(Token(TokenType.IMPORT, "import", None, 1), Token(TokenType.STRING, f'"{name}"', name, 1))
+
+
+def first_import_ms(directory: Path, stmt: Import) -> float:
+    """One import through a fresh module cache, as in a new process."""
+    interpreter = Interpreter()
+    interpreter.directory = directory
+    interpreter.modules = ModuleCache()
+    start = perf_counter()
+    interpreter.execute(stmt)
+    return (perf_counter() - start) * 1e3
+
+
+def main():
+    library = large_source().rsplit("print", 1)[0]
+    with tempfile.TemporaryDirectory() as temp:
+        directory = Path(temp)
+        (directory / "library.lox").write_text(library)
+        stmt = import_statement("library.lox")
+
+        cold = first_import_ms(directory, stmt)
+        disk_cached = min(first_import_ms(directory, stmt) for _ in range(5))
+
+        interpreter = Interpreter()
+        interpreter.directory = directory
+        interpreter.execute(stmt)
+        warm = min(Timer(lambda: interpreter.execute(stmt)).repeat(repeat=5, number=NUMBER)) / NUMBER
+
+    print(f"library: {len(library)} characters, {library.count('fun ')} functions")
+    print(f"{'first import, parsed':<36}{cold:>10.2f} ms")
+    print(f"{'first import, from program cache':<36}{disk_cached:>10.2f} ms")
+    print(f"{'import again':<36}{warm * 1e6:>10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Lexing throughput of the character scanner against the regex scanner.
+
+Scans the generated large_source workload, repeated to a few MiB, with
+both scanners, after checking that they produce identical token streams.
+
+    python -m benchmarks.micro.scanner_throughput
+"""
+import gc
+from time import perf_counter
+
+from src.bench import large_source
+from src.lexer.regex_scanner import RegexScanner
+from src.lexer.scanner import Scanner
+
+COPIES = 8
+
+
+def signature(scanner_class, source: str):
+    return [(t.type, t.lexeme, t.literal, t.line) for t in scanner_class(source).scan_tokens()]
+
+
+def scan(scanner_class, source: str):
+    gc.collect()
+    start = perf_counter()
+    count = len(scanner_class(source).scan_tokens())
+    return count, perf_counter() - start
+
+
+def main():
+    unit = large_source()
+    identical = signature(Scanner, unit) == signature(RegexScanner, unit)
+
+    source = unit * COPIES
+    mib = len(source.encode()) / (1024 * 1024)
+    count, char_time = scan(Scanner, source)
+    _, regex_time = scan(RegexScanner, source)
+
+    print(f"source: {mib:.2f} MiB, {count} tokens, identical streams: {identical}")
+    print(f"{'scanner':<10}{'seconds':>10}{'MiB/s':>10}{'tokens/s':>14}")
+    for name, elapsed in (("char", char_time), ("regex", regex_time)):
+        print(f"{name:<10}{elapsed:>10.2f}{mib / elapsed:>10.2f}{count / elapsed:>14,.0f}")
+    print(f"speedup: {char_time / regex_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Memory held by a scanned token stream.
+
+Compares a list of Token objects against the column-wise TokenArray on
+the generated large_source workload, and times how long each takes to
+build.
+
+    python -m benchmarks.micro.token_memory
+"""
+import gc
+import tracemalloc
+from time import perf_counter
+
+from src.bench import large_source
+from src.lexer.regex_scanner import RegexScanner
+
+COPIES = 4
+
+
+def measure(build):
+    gc.collect()
+    start = perf_counter()
+    count = len(build())
+    elapsed = perf_counter() - start
+
+    # traced separately, tracemalloc slows allocation down considerably
+    gc.collect()
+    tracemalloc.start()
+    tokens = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokens
+    return count, size, elapsed
+
+
+def main():
+    source = large_source() * COPIES
+    print(f"source: {len(source.encode()) / (1024 * 1024):.2f} MiB")
+    print(f"{'representation':<16}{'tokens':>10}{'MiB':>10}{'bytes/token':>14}{'seconds':>10}")
+    for name, build in (("list[Token]", lambda: RegexScanner(source).scan_tokens()),
+                        ("TokenArray", lambda: RegexScanner(source).scan_token_array())):
+        count, size, elapsed = measure(build)
+        print(f"{name:<16}{count:>10}{size / (1024 * 1024):>10.2f}{size / count:>14.1f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
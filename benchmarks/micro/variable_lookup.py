@@ -0,0 +1,48 @@
+"""Cost of finding a resolved variable's scope distance.
+
+The resolver used to record distances in a dict keyed by the AST node,
+whose dataclass __hash__ walked the whole subtree. For `Assign` that meant
+hashing the assigned expression on every execution. The distance now
+lives on the node, so the lookup is a plain attribute read regardless of
+how deeply the assigned expression is nested. (Nodes have since become
+identity-hashed, see ast_memory.py, which makes the dict cheap too.)
+
+    python -m benchmarks.micro.variable_lookup
+"""
+from timeit import Timer
+
+from src.asts.syntax_trees import Assign, Binary, Literal
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+
+NUMBER = 10_000
+DEPTHS = (1, 10, 100, 300)
+
+
+def nested_assign(depth: int) -> Assign:
+    value = Literal(1.0)
+    for _ in range(depth):
+        value = Binary(value, Token(TokenType.PLUS, "+", None, 1), Literal(1.0))
+
+    return Assign(Token(TokenType.IDENTIFIER, "a", None, 1), value)
+
+
+def per_lookup_ns(stmt: str, namespace: dict) -> float:
+    timer = Timer(stmt, globals=namespace)
+    return min(timer.repeat(repeat=5, number=NUMBER)) / NUMBER * 1e9
+
+
+def main():
+    print(f"{'depth':<8}{'node-keyed dict (ns)':>22}{'on node (ns)':>16}")
+    for depth in DEPTHS:
+        expr = nested_assign(depth)
+        expr.depth = 0
+        namespace = {"expr": expr, "locals": {expr: 0}}
+
+        keyed = per_lookup_ns("locals.get(expr, None)", namespace)
+        on_node = per_lookup_ns("expr.depth", namespace)
+        print(f"{depth:<8}{keyed:>22.1f}{on_node:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Per-visit cost of the @visitor dispatch.
+
+Compares the original string-keyed lookup, which rebuilt the visitor's
+qualified name and probed the global `_methods` dict on every visit,
+against the per-class dispatch table now installed by @visitor.
+
+    python -m benchmarks.micro.visitor_dispatch
+"""
+from timeit import Timer
+
+from src.asts.syntax_trees import Binary, Literal
+from src.common.visitor import _methods, _qualname
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.parser.interpreter import Interpreter
+
+NUMBER = 1_000_000
+
+
+def legacy_visit(self, arg):
+    method = _methods[(_qualname(type(self))), type(arg)]
+    return method(self, arg)
+
+
+def per_visit_ns(stmt: str, namespace: dict) -> float:
+    timer = Timer(stmt, globals=namespace)
+    return min(timer.repeat(repeat=5, number=NUMBER)) / NUMBER * 1e9
+
+
+def main():
+    interpreter = Interpreter()
+    literal = Literal(1.0)
+    binary = Binary(literal, Token(TokenType.PLUS, "+", None, 1), literal)
+    namespace = {"interp": interpreter, "literal": literal, "binary": binary}
+
+    print(f"{'node':<10}{'legacy (ns)':>14}{'table (ns)':>14}{'speedup':>10}")
+    for node in ("literal", "binary"):
+        # patched at class level so that nested visits (Binary visits both
+        # operands) go through the legacy lookup as well
+        dispatch = Interpreter.visit
+        Interpreter.visit = legacy_visit
+        try:
+            legacy = per_visit_ns(f"interp.visit({node})", namespace)
+        finally:
+            Interpreter.visit = dispatch
+
+        table = per_visit_ns(f"interp.visit({node})", namespace)
+        print(f"{node:<10}{legacy:>14.1f}{table:>14.1f}{legacy / table:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,164 @@
-import sys
-from abc import ABC
+"""Generates src/asts/syntax_trees.py.
 
-sys.path.append("/Users/rutvijshah/PycharmProjects/pylox")
+Every node is a slotted dataclass with identity equality and hashing, so
+nodes stay small and can key caches in O(1). Fields filled in after
+parsing (by the resolver, or by the interpreter for inline caches) come
+last with defaults, followed by the optional source span.
 
+    python scratch/autogen_classes.py > src/asts/syntax_trees.py
+"""
 
-class Expr(ABC):
-    pass
+# field name -> type annotation, or (annotation, default, comment) for
+# fields the parser doesn't set
+Spec = dict
 
-
-args_dicts = {
+expr_types: dict[str, Spec] = {
+    "Assign": {
+        "name": "Token",
+        "value": "Expr",
+        "depth": ("int | None", "None", "scope distance and slot filled in by the resolver, None for globals"),
+        "slot": ("int | None", "None", None),
+        "cell": ("Any", "None", "a global's cell, cached while the globals are at `version`"),
+        "version": ("int", "-1", None),
+    },
     "Binary": {
         "left": "Expr",
         "operator": "Token",
-        "right": "Expr"
+        "right": "Expr",
+    },
+    "Call": {
+        "callee": "Expr",
+        "paren": "Token",
+        "arguments": "List[Expr]",
+        "target": ("Any", "None", "inline cache: the declaration (or native) last called from here, and its hit/miss counts"),
+        "hits": ("int", "0", None),
+        "misses": ("int", "0", None),
     },
     "Grouping": {
-        "expression": "Expr"
+        "expression": "Expr",
     },
     "Literal": {
-        "value": "object"
+        "value": "Any",
+    },
+    "Logical": {
+        "left": "Expr",
+        "operator": "Token",
+        "right": "Expr",
     },
     "Unary": {
         "operator": "Token",
-        "right": "Expr"
-    }
+        "right": "Expr",
+    },
+    "Variable": {
+        "name": "Token",
+        "depth": ("int | None", "None", "scope distance and slot filled in by the resolver, None for globals"),
+        "slot": ("int | None", "None", None),
+        "cell": ("Any", "None", "a global's cell, cached while the globals are at `version`"),
+        "version": ("int", "-1", None),
+    },
 }
 
+stmt_types: dict[str, Spec] = {
+    "Block": {
+        "statements": "List[Stmt]",
+        "size": ("int", "0", "number of local slots the block's scope needs"),
+    },
+    "Expression": {
+        "expression": "Expr",
+    },
+    "Function": {
+        "name": "Token",
+        "params": "List[Token]",
+        "body": "List[Stmt]",
+        "slot": ("int | None", "None", "slot of the function's name, None when declared at global scope"),
+        "size": ("int", "0", "number of local slots for the parameters and top level of the body"),
+    },
+    "If": {
+        "condition": "Expr",
+        "then_branch": "Stmt",
+        "else_branch": "Stmt",
+    },
+    "Import": {
+        "keyword": "Token",
+        "path": "Token",
+    },
+    "Print": {
+        "expression": "Expr",
+    },
+    "Return": {
+        "keyword": "Token",
+        "value": "Expr",
+    },
+    "Var": {
+        "name": "Token",
+        "initializer": "Expr",
+        "slot": ("int | None", "None", "slot of the variable, None when declared at global scope"),
+    },
+    "While": {
+        "condition": "Expr",
+        "body": "Stmt",
+    },
+}
 
-def gen_init(self, **kwargs):
-    self.__dict__.update(kwargs)
+HEADER = '''\
+# Generated by scratch/autogen_classes.py, edit the spec there instead.
+from dataclasses import dataclass
+from typing import Any, List, Tuple
 
+from src.lexer.token import Token
 
-def dict_opener(dicti):
-    mstrings = []
-    for key, val in dicti.items():
-        mstrings.append(f"{key}='{val}',")
+# (first line, last line) of the source a node was parsed from
+Span = Tuple[int, int]
 
-    return " ".join(mstrings)
 
+class Node:
+    """Base of all syntax tree nodes.
 
-def init_creator(cls_name, args_dict):
-    estring = f"""def {cls_name}_init(self, {dict_opener(args_dict)}):
-        self.__dict__.update({repr(args_dict)})
+    Nodes compare and hash by identity, so any node can key a dict
+    without walking its subtree.
     """
-    return estring
+    __slots__ = ()
+
+    @property
+    def node_id(self) -> int:
+        """Unique among live nodes, and free: it's the object's identity."""
+        return id(self)
+
+    def __reduce__(self):
+        # positional fields instead of the default per-slot state dict,
+        # which halves the size of pickled programs
+        return type(self), tuple([getattr(self, name) for name in self.__slots__])
+'''
+
+
+def define_base(name: str) -> str:
+    return f"\n\nclass {name}(Node):\n    __slots__ = ()\n"
+
+
+def define_type(base: str, name: str, fields: Spec) -> str:
+    lines = ["", "", "@dataclass(slots=True, eq=False)", f"class {name}({base}):"]
+    for field_name, spec in fields.items():
+        if isinstance(spec, str):
+            lines.append(f"    {field_name}: {spec}")
+            continue
+
+        annotation, default, comment = spec
+        if comment:
+            lines.append(f"    # {comment}")
+        lines.append(f"    {field_name}: {annotation} = {default}")
+
+    lines.append("    span: Span | None = None")
+    return "\n".join(lines) + "\n"
+
+
+def generate() -> str:
+    parts = [HEADER]
+    for base, types in (("Expr", expr_types), ("Stmt", stmt_types)):
+        parts.append(define_base(base))
+        parts.extend(define_type(base, name, fields) for name, fields in types.items())
+
+    return "".join(parts)
 
 
-for k, v in args_dicts.items():
-    exec(init_creator(k, v))
-    locals()[k] = type(k, (Expr,), {"__init__": locals()[f"{k}_init"]})
\ No newline at end of file
+if __name__ == "__main__":
+    print(generate(), end="")
@@ -1,108 +1,177 @@
+# Generated by scratch/autogen_classes.py, edit the spec there instead.
 from dataclasses import dataclass
-from typing import Any, List
-from uuid import uuid4
+from typing import Any, List, Tuple
 
 from src.lexer.token import Token
 
+# (first line, last line) of the source a node was parsed from
+Span = Tuple[int, int]
 
-class Expr:
-    pass
 
+class Node:
+    """Base of all syntax tree nodes.
 
-@dataclass(unsafe_hash=True)
+    Nodes compare and hash by identity, so any node can key a dict
+    without walking its subtree.
+    """
+    __slots__ = ()
+
+    @property
+    def node_id(self) -> int:
+        """Unique among live nodes, and free: it's the object's identity."""
+        return id(self)
+
+    def __reduce__(self):
+        # positional fields instead of the default per-slot state dict,
+        # which halves the size of pickled programs
+        return type(self), tuple([getattr(self, name) for name in self.__slots__])
+
+
+class Expr(Node):
+    __slots__ = ()
+
+
+@dataclass(slots=True, eq=False)
 class Assign(Expr):
     name: Token
     value: Expr
+    # scope distance and slot filled in by the resolver, None for globals
+    depth: int | None = None
+    slot: int | None = None
+    # a global's cell, cached while the globals are at `version`
+    cell: Any = None
+    version: int = -1
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Binary(Expr):
     left: Expr
     operator: Token
     right: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Call(Expr):
     callee: Expr
     paren: Token
     arguments: List[Expr]
+    # inline cache: the declaration (or native) last called from here, and its hit/miss counts
+    target: Any = None
+    hits: int = 0
+    misses: int = 0
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Grouping(Expr):
     expression: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Literal(Expr):
     value: Any
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Logical(Expr):
     left: Expr
     operator: Token
     right: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Unary(Expr):
     operator: Token
     right: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Variable(Expr):
     name: Token
+    # scope distance and slot filled in by the resolver, None for globals
+    depth: int | None = None
+    slot: int | None = None
+    # a global's cell, cached while the globals are at `version`
+    cell: Any = None
+    version: int = -1
+    span: Span | None = None
 
 
-class Stmt:
-    pass
+class Stmt(Node):
+    __slots__ = ()
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Block(Stmt):
     statements: List[Stmt]
+    # number of local slots the block's scope needs
+    size: int = 0
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Expression(Stmt):
     expression: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Function(Stmt):
     name: Token
     params: List[Token]
     body: List[Stmt]
+    # slot of the function's name, None when declared at global scope
+    slot: int | None = None
+    # number of local slots for the parameters and top level of the body
+    size: int = 0
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class If(Stmt):
     condition: Expr
     then_branch: Stmt
     else_branch: Stmt
+    span: Span | None = None
+
+
+@dataclass(slots=True, eq=False)
+class Import(Stmt):
+    keyword: Token
+    path: Token
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Print(Stmt):
     expression: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Return(Stmt):
     keyword: Token
     value: Expr
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class Var(Stmt):
     name: Token
     initializer: Expr
+    # slot of the variable, None when declared at global scope
+    slot: int | None = None
+    span: Span | None = None
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(slots=True, eq=False)
 class While(Stmt):
     condition: Expr
     body: Stmt
+    span: Span | None = None
@@ -0,0 +1,200 @@
+"""Benchmark runner for the Lox workloads in benchmarks/.
+
+    pylox bench [--engine=tree|vm|closure] [--opt-level 0|1] [--repeat N] [--json FILE]
+                [--baseline FILE] [--save-baseline FILE] [--threshold F] [name ...]
+
+Every workload is run `repeat` times with each phase (scan, parse,
+resolve, optimize, execute) timed separately, plus one extra run under tracemalloc
+for peak memory. Results are printed as a table and emitted as JSON;
+when a baseline is given, any workload whose median wall time grew by
+more than the threshold is reported and the exit status is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from src.error_handler import Session
+from src.lexer.regex_scanner import RegexScanner
+from src.parser.optimizer import Optimizer
+from src.parser.rec_des_parser import Parser
+from src.parser.resolver import Resolver
+
+BENCHMARKS_DIR = Path(__file__).parents[1] / "benchmarks"
+PHASES = ("scan", "parse", "resolve", "optimize", "execute")
+
+
+def large_source() -> str:
+    """A big program that is mostly declarations, to weigh the front end."""
+    unit = """
+fun helper{i}(a, b) {{
+  var total = a * {i} + b;
+  if (total > 100 and !(total == 101)) {{
+    total = total - (a + b) / 2;
+  }} else {{
+    total = -total + 1;
+  }}
+  while (total > 1000) total = total / 2;
+  return total;
+}}
+var value{i} = helper{i}({i}, {i} + 1);
+"""
+    return "".join(unit.format(i=i) for i in range(1500)) + "print value1499;\n"
+
+
+def load_workloads() -> Dict[str, Callable[[], str]]:
+    workloads = {path.stem: path.read_text for path in sorted(BENCHMARKS_DIR.glob("*.lox"))}
+    workloads["large_source"] = large_source
+    return workloads
+
+
+def run_phases(source: str, engine, opt_level: int = 1) -> Dict[str, float]:
+    """Run one workload to completion, returning the seconds spent per phase."""
+    timings = {}
+    session = Session()
+    interp = engine(session)
+
+    start = perf_counter()
+    tokens = RegexScanner(source, session).scan_tokens()
+    timings["scan"] = perf_counter() - start
+
+    start = perf_counter()
+    statements = Parser(tokens, session).parse()
+    timings["parse"] = perf_counter() - start
+
+    if session.had_error:
+        raise RuntimeError("workload failed to parse")
+
+    start = perf_counter()
+    Resolver(session).resolve(statements)
+    timings["resolve"] = perf_counter() - start
+
+    if session.had_error:
+        raise RuntimeError("workload failed to resolve")
+
+    start = perf_counter()
+    if opt_level >= 1:
+        statements = Optimizer().optimize(statements)
+    timings["optimize"] = perf_counter() - start
+
+    start = perf_counter()
+    interp.interpret(statements)
+    timings["execute"] = perf_counter() - start
+
+    if session.had_runtime_error:
+        raise RuntimeError("workload raised a runtime error")
+
+    return timings
+
+
+def measure(source: str, engine, repeat: int, opt_level: int = 1) -> Dict:
+    runs = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            runs.append(run_phases(source, engine, opt_level))
+
+        tracemalloc.start()
+        try:
+            run_phases(source, engine, opt_level)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "wall": statistics.median(sum(run.values()) for run in runs),
+        "phases": {phase: statistics.median(run[phase] for run in runs) for phase in PHASES},
+        "peak_memory": peak,
+        "source_bytes": len(source.encode()),
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None:
+            continue
+
+        ratio = result["wall"] / previous["wall"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {previous['wall'] * 1e3:.1f} ms -> "
+                               f"{result['wall'] * 1e3:.1f} ms ({(ratio - 1) * 100:+.1f}%)")
+
+    return regressions
+
+
+def print_table(results: Dict):
+    header = f"{'benchmark':<16}{'wall ms':>10}" + "".join(f"{p + ' ms':>12}" for p in PHASES)
+    print(header + f"{'peak KiB':>12}{'vs base':>10}", file=sys.stderr)
+    for name, result in results["benchmarks"].items():
+        phases = "".join(f"{result['phases'][p] * 1e3:>12.2f}" for p in PHASES)
+        ratio = result.get("baseline_ratio")
+        versus = f"{(ratio - 1) * 100:>+9.1f}%" if ratio is not None else f"{'-':>10}"
+        print(f"{name:<16}{result['wall'] * 1e3:>10.2f}{phases}"
+              f"{result['peak_memory'] / 1024:>12.1f}{versus}", file=sys.stderr)
+
+
+def main(args: List[str]) -> int:
+    from src.lox import ENGINES
+
+    workloads = load_workloads()
+
+    arg_parser = argparse.ArgumentParser(prog="pylox bench", description="Run the Lox benchmark suite.")
+    arg_parser.add_argument("names", nargs="*", metavar="name",
+                            help=f"workloads to run (default: all of {', '.join(workloads)})")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--opt-level", type=int, choices=(0, 1), default=1)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--json", metavar="FILE", help="write results to FILE instead of stdout")
+    arg_parser.add_argument("--baseline", metavar="FILE", help="compare against a saved run")
+    arg_parser.add_argument("--save-baseline", metavar="FILE", help="save this run as a baseline")
+    arg_parser.add_argument("--threshold", type=float, default=0.10,
+                            help="relative slowdown reported as a regression (default: 0.10)")
+    options = arg_parser.parse_args(args)
+
+    unknown = set(options.names) - set(workloads)
+    if unknown:
+        arg_parser.error(f"unknown workload(s): {', '.join(sorted(unknown))}")
+
+    results = {
+        "engine": options.engine,
+        "opt_level": options.opt_level,
+        "python": platform.python_version(),
+        "repeat": options.repeat,
+        "benchmarks": {},
+    }
+    for name in options.names or workloads:
+        results["benchmarks"][name] = measure(workloads[name](), ENGINES[options.engine], options.repeat,
+                                             options.opt_level)
+
+    regressions = []
+    if options.baseline:
+        baseline = json.loads(Path(options.baseline).read_text())
+        regressions = compare(results, baseline, options.threshold)
+
+    print_table(results)
+
+    output = json.dumps(results, indent=2)
+    if options.json:
+        Path(options.json).write_text(output + "\n")
+    else:
+        print(output)
+
+    if options.save_baseline:
+        Path(options.save_baseline).write_text(output + "\n")
+
+    if regressions:
+        print("\nRegressions against baseline:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+
+    return 0
@@ -0,0 +1,75 @@
+"""Thin client for `pylox serve`.
+
+    python -m src.client [--socket PATH] [script | -]
+
+Sends the script to the server and prints what it printed, exiting with
+the script's status like `pylox script` would. Nothing from the
+interpreter is imported, so the client starts about as fast as Python.
+
+The protocol is one JSON object per line in each direction. A request has
+`source` and, optionally, `directory` for its imports and `input` for
+`readLine`; the response has `status`, `output`, `errors` and `seconds`.
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def default_socket() -> str:
+    return os.path.join(tempfile.gettempdir(), f"pylox-{os.getuid()}.sock")
+
+
+def request(source: str, directory: str | None = None, path: str | None = None,
+            input: str | None = None) -> Dict[str, Any]:
+    """Run `source` on the server listening at `path` and return its response."""
+    message = {"source": source}
+    if directory is not None:
+        message["directory"] = directory
+    if input is not None:
+        message["input"] = input
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path or default_socket())
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        with connection.makefile("rb") as reply:
+            line = reply.readline()
+
+    if not line:
+        raise ConnectionError("the server closed the connection")
+    return json.loads(line)
+
+
+def main(args: List[str]) -> int:
+    arg_parser = argparse.ArgumentParser(prog="pylox client", description="Run a script on a pylox server.")
+    arg_parser.add_argument("script", nargs="?", default="-", help="the script to run, - for stdin")
+    arg_parser.add_argument("--socket", default=default_socket(), help=f"(default: {default_socket()})")
+    options = arg_parser.parse_args(args)
+
+    if options.script == "-":
+        source, directory = sys.stdin.read(), os.getcwd()
+    else:
+        try:
+            source = Path(options.script).read_text()
+        except OSError:
+            print(f"error: File at {options.script} wasn't found.")
+            return 66
+        directory = str(Path(options.script).resolve().parent)
+
+    try:
+        response = request(source, directory, options.socket)
+    except OSError as error:
+        print(f"error: Can't reach the server at {options.socket}: {error.strerror or error}", file=sys.stderr)
+        return 69
+
+    # errors go to stdout after the output, as they do when running locally
+    sys.stdout.write(response["output"] + response["errors"])
+    return response["status"]
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
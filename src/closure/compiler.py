@@ -0,0 +1,434 @@
+from typing import List
+
+from src.asts.syntax_trees import (Literal, Grouping, Expr, Unary, Binary,
+                                   Expression, Print, Stmt, Var, Variable,
+                                   Assign, Block, If, Logical, While, Call, Function, Return, Import)
+from src.closure.objects import Code, CompiledFunction, invoke, running
+from src.common.completion import TailCall
+from src.common.environment import Environment, GlobalEnvironment
+from src.common.lox_callable import LoxCallable
+from src.common.visitor import visitor
+from src.error_handler import LoxRuntimeError
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.parser.interpreter import Interpreter
+from src.parser.native_functions import NativeError
+
+
+def sequence(statements: List[Code]) -> Code:
+    if len(statements) == 1:
+        return statements[0]
+
+    def run(env):
+        for statement in statements:
+            result = statement(env)
+            if result is not None:
+                return result
+        return None
+
+    return run
+
+
+class ClosureCompiler:
+    """Compiles resolved statements into nested Python closures.
+
+    Every node is visited once, up front; what the tree walker decides on
+    each evaluation (which operator, how far up the scope chain a variable
+    lives, whether it is a global) is decided here instead, and the
+    returned closures only do the work that is left. Locals use the
+    resolver's depth and slot, globals go through a cell each site caches
+    from `globals_`.
+    """
+
+    def __init__(self, globals_: GlobalEnvironment, interpreter):
+        self.globals = globals_
+        self.interpreter = interpreter
+
+    def compile(self, statements: List[Stmt]) -> List[Code]:
+        return [self.compile_node(stmt) for stmt in statements]
+
+    def compile_node(self, node: Stmt | Expr) -> Code:
+        # noinspection PyTypeChecker
+        return self.visit(node)
+
+    @visitor(Return)
+    def visit(self, stmt: Return):
+        if stmt.value is None:
+            return lambda env: (None,)
+
+        if type(stmt.value) is Call:
+            return self.call(stmt.value, tail=True)
+
+        value = self.compile_node(stmt.value)
+        return lambda env: (value(env),)
+
+    @visitor(Function)
+    def visit(self, stmt: Function):
+        body = sequence(self.compile(stmt.body)) if stmt.body else lambda env: None
+
+        if stmt.slot is None:
+            define = self.globals.define
+            name = stmt.name.lexeme
+
+            def define_global(env):
+                define(name, CompiledFunction(stmt, body, env))
+            return define_global
+
+        slot = stmt.slot
+
+        def define_local(env):
+            env.values[slot] = CompiledFunction(stmt, body, env)
+        return define_local
+
+    @visitor(Block)
+    def visit(self, stmt: Block):
+        body = sequence(self.compile(stmt.statements)) if stmt.statements else lambda env: None
+        size = stmt.size
+
+        return lambda env: body(Environment(env, [None] * size))
+
+    @visitor(Expression)
+    def visit(self, stmt: Expression):
+        expression = self.compile_node(stmt.expression)
+
+        def run(env):
+            expression(env)
+        return run
+
+    @visitor(If)
+    def visit(self, stmt: If):
+        condition = self.compile_node(stmt.condition)
+        then_branch = self.compile_node(stmt.then_branch)
+        if stmt.else_branch is None:
+            def run(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    return then_branch(env)
+                return None
+            return run
+
+        else_branch = self.compile_node(stmt.else_branch)
+
+        def run_else(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                return then_branch(env)
+            return else_branch(env)
+        return run_else
+
+    @visitor(Import)
+    def visit(self, stmt: Import):
+        globals_ = self.globals
+        # imports are relative to the file being compiled
+        directory = self.interpreter.directory
+        keyword, name = stmt.keyword, stmt.path.literal
+
+        def run(env):
+            interpreter = running.get()
+            globals_.bind(interpreter.modules.load(keyword, name, directory, interpreter).exports)
+        return run
+
+    @visitor(Print)
+    def visit(self, stmt: Print):
+        expression = self.compile_node(stmt.expression)
+        stringify = Interpreter.stringify
+
+        def run(env):
+            # looked up per print, as embed.Lox gives each run a new session
+            print(stringify(expression(env)), file=running.get().session.out)
+        return run
+
+    @visitor(Var)
+    def visit(self, stmt: Var):
+        initializer = self.compile_node(stmt.initializer) if stmt.initializer is not None else lambda env: None
+
+        if stmt.slot is None:
+            define = self.globals.define
+            name = stmt.name.lexeme
+
+            def define_global(env):
+                define(name, initializer(env))
+            return define_global
+
+        slot = stmt.slot
+
+        def define_local(env):
+            env.values[slot] = initializer(env)
+        return define_local
+
+    @visitor(While)
+    def visit(self, stmt: While):
+        condition = self.compile_node(stmt.condition)
+        body = self.compile_node(stmt.body)
+
+        def run(env):
+            while True:
+                value = condition(env)
+                if value is None or value is False:
+                    return None
+                result = body(env)
+                if result is not None:
+                    return result
+        return run
+
+    @visitor(Assign)
+    def visit(self, expr: Assign):
+        value = self.compile_node(expr.value)
+        slot = expr.slot
+
+        match expr.depth:
+            case None:
+                globals_ = self.globals
+                name = expr.name
+                cell, version = None, -1
+
+                def assign_global(env):
+                    nonlocal cell, version
+                    result = value(env)
+                    if version != globals_.version:
+                        cell, version = globals_.cell(name), globals_.version
+                    cell.value = result
+                    return result
+                return assign_global
+
+            case 0:
+                def assign_local(env):
+                    env.values[slot] = result = value(env)
+                    return result
+                return assign_local
+
+            case 1:
+                def assign_enclosing(env):
+                    env.enclosing.values[slot] = result = value(env)
+                    return result
+                return assign_enclosing
+
+        depth = expr.depth
+
+        def assign_at(env):
+            result = value(env)
+            env.assign_at(depth, slot, result)
+            return result
+        return assign_at
+
+    @visitor(Variable)
+    def visit(self, expr: Variable):
+        slot = expr.slot
+
+        match expr.depth:
+            case None:
+                globals_ = self.globals
+                name = expr.name
+                # this site's cached cell, see GlobalEnvironment
+                cell, version = None, -1
+
+                def get_global(env):
+                    nonlocal cell, version
+                    if version != globals_.version:
+                        cell, version = globals_.cell(name), globals_.version
+                    return cell.value
+                return get_global
+
+            case 0:
+                return lambda env: env.values[slot]
+
+            case 1:
+                return lambda env: env.enclosing.values[slot]
+
+        depth = expr.depth
+        return lambda env: env.get_at(depth, slot)
+
+    @visitor(Literal)
+    def visit(self, expr: Literal):
+        value = expr.value
+        return lambda env: value
+
+    @visitor(Logical)
+    def visit(self, expr: Logical):
+        left = self.compile_node(expr.left)
+        right = self.compile_node(expr.right)
+
+        if expr.operator.type == TokenType.OR:
+            def logical_or(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+            return logical_or
+
+        def logical_and(env):
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+        return logical_and
+
+    @visitor(Grouping)
+    def visit(self, expr: Grouping):
+        return self.compile_node(expr.expression)
+
+    @visitor(Unary)
+    def visit(self, expr: Unary):
+        right = self.compile_node(expr.right)
+        operator = expr.operator
+
+        match operator.type:
+            case TokenType.BANG:
+                def negate(env):
+                    value = right(env)
+                    return value is None or value is False
+                return negate
+
+            case TokenType.MINUS:
+                def minus(env):
+                    value = right(env)
+                    if isinstance(value, float):
+                        return -value
+                    raise LoxRuntimeError(operator, "Operand must be a number.")
+                return minus
+
+        return lambda env: None
+
+    @visitor(Binary)
+    def visit(self, expr: Binary):
+        left = self.compile_node(expr.left)
+        right = self.compile_node(expr.right)
+        return self.binary(expr.operator, left, right)
+
+    @staticmethod
+    def binary(operator: Token, left: Code, right: Code) -> Code:
+        """The closure for one binary operator, with the operator's checks
+        and error messages exactly as in `Interpreter.visit(Binary)`."""
+
+        def operands_error():
+            return LoxRuntimeError(operator, "Operands must be numbers.")
+
+        match operator.type:
+            case TokenType.GREATER:
+                def greater(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a > b
+                    raise operands_error()
+                return greater
+
+            case TokenType.GREATER_EQUAL:
+                def greater_equal(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a >= b
+                    raise operands_error()
+                return greater_equal
+
+            case TokenType.LESS:
+                def less(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a < b
+                    raise operands_error()
+                return less
+
+            case TokenType.LESS_EQUAL:
+                def less_equal(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a <= b
+                    raise operands_error()
+                return less_equal
+
+            case TokenType.BANG_EQUAL:
+                return lambda env: left(env) != right(env)
+
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right(env)
+
+            case TokenType.MINUS:
+                def subtract(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a - b
+                    raise operands_error()
+                return subtract
+
+            case TokenType.SLASH:
+                def divide(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        if b == 0:
+                            raise LoxRuntimeError(operator, "Division by zero is undefined.")
+                        return a / b
+                    raise operands_error()
+                return divide
+
+            case TokenType.STAR:
+                def multiply(env):
+                    a, b = left(env), right(env)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a * b
+                    raise operands_error()
+                return multiply
+
+            case TokenType.PLUS:
+                def add(env):
+                    a, b = left(env), right(env)
+                    if (isinstance(a, float) and isinstance(b, float)) or \
+                            (isinstance(a, str) and isinstance(b, str)):
+                        return a + b
+                    raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
+                return add
+
+        return lambda env: None
+
+    @visitor(Call)
+    def visit(self, expr: Call):
+        return self.call(expr, tail=False)
+
+    def call(self, expr: Call, tail: bool) -> Code:
+        """A call expression, or with `tail` the statement `return expr;`,
+        which leaves a call to a Lox function to the caller's `invoke`."""
+        callee = self.compile_node(expr.callee)
+        arguments = self.compile(expr.arguments)
+        paren = expr.paren
+
+        def call_other(function, args):
+            if not isinstance(function, LoxCallable):
+                raise LoxRuntimeError(paren, "Can only call functions and classes.")
+
+            if len(args) != function.arity():
+                raise LoxRuntimeError(paren, f"Expected {function.arity()} arguments but got {len(args)}.")
+            try:
+                return function.call(running.get(), args)
+            except NativeError as err:
+                raise LoxRuntimeError(paren, str(err)) from None
+            except RecursionError:
+                raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+        if tail:
+            def tail_call(env):
+                function = callee(env)
+                args = [argument(env) for argument in arguments]
+
+                if type(function) is CompiledFunction:
+                    if len(args) != function.param_count:
+                        raise LoxRuntimeError(paren, f"Expected {function.param_count} arguments but got {len(args)}.")
+                    return TailCall(function, args)
+
+                return (call_other(function, args),)
+            return tail_call
+
+        def call(env):
+            function = callee(env)
+            args = [argument(env) for argument in arguments]
+
+            if type(function) is CompiledFunction:
+                if len(args) != function.param_count:
+                    raise LoxRuntimeError(paren, f"Expected {function.param_count} arguments but got {len(args)}.")
+                try:
+                    return invoke(function, args)
+                except RecursionError:
+                    # Python's stack ran out, report it where the VM would
+                    raise LoxRuntimeError(paren, "Stack overflow.") from None
+
+            return call_other(function, args)
+
+        return call
@@ -0,0 +1,72 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Coroutine, List
+
+from src.asts.syntax_trees import Stmt
+from src.closure.compiler import ClosureCompiler
+from src.closure.objects import running
+from src.common.environment import GlobalEnvironment
+from src.error_handler import LoxRuntimeError, Session
+from src.modules import ModuleCache
+from src.parser.native_functions import IO_NATIVES, define_natives, run_coroutine
+
+
+class ClosureInterpreter:
+    """Runs programs compiled to closures by `ClosureCompiler`.
+
+    Exposes the same `interpret` surface as `Interpreter`, and like it
+    relies on the resolver for every local's depth and slot.
+    """
+
+    # shared by every closure interpreter in the process, see src.modules
+    modules = ModuleCache()
+
+    def __init__(self, session: Session | None = None):
+        self.session = session if session is not None else Session()
+        self.globals = GlobalEnvironment()
+        # what `import` paths are relative to
+        self.directory = Path.cwd()
+        # what imported modules are optimized at, see src.lox.execute
+        self.opt_level = 1
+        # the event loop async natives run on, see src.embed.AsyncLox
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # whether scripts may use sleep, readFile and readLine, see enable_io
+        self.io = False
+
+        self.define_natives(self.globals)
+
+    def define_natives(self, globals_: GlobalEnvironment):
+        define_natives(globals_, self.io)
+
+    def enable_io(self):
+        """Give the program, and modules this interpreter loads from now on,
+        the natives that sleep and read files and standard input."""
+        self.io = True
+        for name, native in IO_NATIVES.items():
+            self.globals.define(name, native())
+
+    def wait(self, coroutine: Coroutine) -> Any:
+        """Run an async native's coroutine, see `AsyncNative`."""
+        return run_coroutine(coroutine, self.loop)
+
+    def interpret(self, statements: List[Stmt]):
+        code = ClosureCompiler(self.globals, self).compile(statements)
+        token = running.set(self)
+        try:
+            for statement in code:
+                statement(self.globals)
+        except LoxRuntimeError as err:
+            self.session.runtime_error(err)
+        finally:
+            running.reset(token)
+
+    def run_module(self, statements: List[Stmt], globals_: GlobalEnvironment, directory: Path):
+        # a module's code is compiled against its own globals, so unlike the
+        # tree walker nothing needs swapping when its functions are called
+        previous = self.directory
+        self.directory = directory
+        try:
+            for statement in ClosureCompiler(globals_, self).compile(statements):
+                statement(globals_)
+        finally:
+            self.directory = previous
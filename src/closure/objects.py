@@ -0,0 +1,53 @@
+from contextvars import ContextVar
+from typing import Any, Callable, List
+
+from src.asts.syntax_trees import Function
+from src.common.completion import TailCall
+from src.common.environment import Environment, GlobalEnvironment
+from src.common.lox_callable import LoxCallable
+
+# Compiled statements return None to carry on, or, like the tree walker's
+# statements, a 1-tuple holding the value of a `return` that is unwinding
+# to the enclosing call or a TailCall for `return f(...)`.
+Code = Callable[[Environment | GlobalEnvironment], Any]
+
+# The ClosureInterpreter whose `interpret` is running. A module is compiled
+# once and then run by every interpreter that imports it, so compiled code
+# that needs the interpreter, for its session or to pass to natives, looks
+# it up here when it runs.
+running: ContextVar = ContextVar("running")
+
+
+class CompiledFunction(LoxCallable):
+    """A Lox function whose body has been compiled to a closure."""
+
+    def __init__(self, declaration: Function, body: Code, closure: Environment | GlobalEnvironment):
+        self.declaration = declaration
+        self.body = body
+        self.closure = closure
+        self.param_count = len(declaration.params)
+        self.size = declaration.size
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        return invoke(self, arguments)
+
+    def arity(self) -> int:
+        return self.param_count
+
+    def __str__(self):
+        return f"<fn {self.declaration.name.lexeme}>"
+
+
+def invoke(function: CompiledFunction, arguments: List[Any]) -> Any:
+    """Call `function`, then any tail call its body completes with, in a
+    loop like `LoxFunction.call`'s."""
+    while True:
+        # same frame layout as LoxFunction: the arguments become the frame
+        arguments.extend([None] * (function.size - len(arguments)))
+        result = function.body(Environment(function.closure, arguments))
+        if result is None:
+            return None
+        if type(result) is not TailCall:
+            return result[0]
+
+        function, arguments = result.function, result.arguments
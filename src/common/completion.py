@@ -0,0 +1,19 @@
+from typing import Any, List
+
+
+class TailCall:
+    """What a `return f(...)` statement completes with when f is a
+    `LoxFunction`: the call still to be made, so that the caller's
+    `LoxFunction.call` runs it in its own loop instead of nesting."""
+
+    __slots__ = ("function", "arguments")
+
+    def __init__(self, function, arguments: List[Any]):
+        self.function = function
+        self.arguments = arguments
+
+
+# Statements complete with None to carry on with the next statement, or,
+# when a `return` is unwinding to the enclosing call, with a 1-tuple
+# holding the returned value or a TailCall.
+NIL_RETURN = (None,)
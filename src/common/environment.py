@@ -1,19 +1,29 @@
 from __future__ import annotations
 
-from typing import Any
+from itertools import count
+from typing import Any, Dict, List, Set
 
 from src.error_handler import LoxRuntimeError
 from src.lexer.token import Token
 
 
 class Environment:
+    """A local scope frame.
 
-    def __init__(self, encl: Environment = None):
-        self.values = dict()
+    The resolver gives every local a fixed slot in its scope, so a frame
+    is just a list addressed by (distance, slot). The caller supplies the
+    list already sized, which lets a function call adopt its argument
+    list as the frame instead of copying it.
+    """
+
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, encl: Environment | GlobalEnvironment = None, values: List[Any] = None):
+        self.values: List[Any] = values if values is not None else []
         self.enclosing = encl
 
-    def define(self, name: str, value: Any):
-        self.values[name] = value
+    def define(self, slot: int, value: Any):
+        self.values[slot] = value
 
     def ancestor(self, distance: int) -> Environment:
         env = self
@@ -22,28 +32,80 @@ class Environment:
 
         return env
 
-    def get_at(self, distance: int, name: str):
-        return self.ancestor(distance).values.get(name)
+    # ancestor() is inlined in both of these, they run on every local access
+    def get_at(self, distance: int, slot: int):
+        env = self
+        for _ in range(distance):
+            env = env.enclosing
+
+        return env.values[slot]
 
-    def assign_at(self, distance: int, name: Token, value: Any):
-        self.ancestor(distance).values[name.lexeme] = value
+    def assign_at(self, distance: int, slot: int, value: Any):
+        env = self
+        for _ in range(distance):
+            env = env.enclosing
 
-    def get(self, name: Token):
-        if name.lexeme in self.values:
-            return self.values[name.lexeme]
+        env.values[slot] = value
 
-        if self.enclosing is not None:
-            return self.enclosing.get(name)
 
-        raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+class GlobalCell:
+    """Holds one global's value; a name keeps its cell unless it is
+    imported, which binds it to the module's cell."""
 
-    def assign(self, name: Token, value: Any):
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-            return
+    __slots__ = ("value",)
 
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
-            return
+    def __init__(self, value: Any):
+        self.value = value
 
-        raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
+# shared by all GlobalEnvironments, so a version identifies both the
+# environment and the set of names defined in it
+_versions = count()
+
+
+class GlobalEnvironment:
+    """The outermost scope, addressed by name since globals can be
+    declared after the code referring to them has been resolved.
+
+    Every name maps to a `GlobalCell`, and `version` changes whenever a
+    new name is defined. A use site can therefore look its cell up once
+    and keep it for as long as the version it saw is current; redefining
+    an existing name just replaces the value in its cell.
+    """
+
+    __slots__ = ("cells", "version", "imported")
+
+    def __init__(self):
+        self.cells: Dict[str, GlobalCell] = dict()
+        self.version = next(_versions)
+        # names bound to another environment's cells by `bind`
+        self.imported: Set[str] = set()
+
+    def define(self, name: str, value: Any):
+        cell = self.cells.get(name)
+        if cell is None or name in self.imported:
+            # declaring an imported name shadows it rather than writing
+            # into the module's cell
+            self.imported.discard(name)
+            self.cells[name] = GlobalCell(value)
+            self.version = next(_versions)
+        else:
+            cell.value = value
+
+    def bind(self, cells: Dict[str, GlobalCell]):
+        """Make names share the given cells, e.g. a module's."""
+        self.cells.update(cells)
+        self.imported.update(cells)
+        self.version = next(_versions)
+
+    def cell(self, name: Token) -> GlobalCell:
+        try:
+            return self.cells[name.lexeme]
+        except KeyError:
+            raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.") from None
+
+    def get(self, name: Token):
+        return self.cell(name).value
+
+    def assign(self, name: Token, value: Any):
+        self.cell(name).value = value
@@ -2,27 +2,30 @@ from typing import Any, List
 
 from src.common.lox_callable import LoxCallable
 from src.asts.syntax_trees import Function
-from src.common.environment import Environment
-from src.common.return_unwind import ReturnUnwind
+from src.common.environment import Environment, GlobalEnvironment
+from src.common.completion import TailCall
 
 
 class LoxFunction(LoxCallable):
 
-    def __init__(self, declaration: Function, closure: Environment):
+    def __init__(self, declaration: Function, closure: Environment | GlobalEnvironment, globals_: GlobalEnvironment):
         self.declaration = declaration
         self.closure = closure
+        # those of the module it was declared in
+        self.globals = globals_
 
     def call(self, interpreter, arguments: List[Any]) -> Any:
-        env: Environment = Environment(self.closure)
-
-        for i, param in enumerate(self.declaration.params):
-            env.define(param.lexeme, arguments[i])
-
-        try:
-            interpreter.execute_block(self.declaration.body, env)
-        except ReturnUnwind as runw:
-            return runw.value
-        return None
+        function = self
+        # tail calls come back from the body as a TailCall and are run by
+        # this loop, so tail recursion doesn't grow the Python stack
+        while True:
+            completion = interpreter.run_body(function, arguments)
+            if completion is None:
+                return None
+            if type(completion) is not TailCall:
+                return completion[0]
+
+            function, arguments = completion.function, completion.arguments
 
     def arity(self) -> int:
         return len(self.declaration.params)
@@ -1,9 +0,0 @@
-from typing import Any
-
-
-class ReturnUnwind(RuntimeError):
-    
-    def __init__(self, value: Any):
-        super(ReturnUnwind, self).__init__()
-        self.value = value
-        
\ No newline at end of file
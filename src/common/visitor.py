@@ -21,11 +21,30 @@ def _declaring_class(obj):
 _methods = {}
 
 
-# Delegating visitor implementation.
-def _visitor_impl(self, arg):
-    """Actual visitor method implementation."""
-    method = _methods[(_qualname(type(self))), type(arg)]
-    return method(self, arg)
+class _VisitorMethod:
+    """Placeholder left in the class body by @visitor.
+
+    Every decorated method rebinds the same name, so only the last
+    placeholder survives until class creation. Its __set_name__ hook then
+    swaps itself for a dispatcher bound to a per-class table, which keeps
+    the per-visit cost down to a single dict lookup keyed by node type.
+    """
+
+    def __set_name__(self, owner, name):
+        table = {}
+        for base in reversed(owner.__mro__[1:]):
+            table.update(getattr(base, "_visit_table", {}))
+
+        declaring_class = _qualname(owner)
+        for (class_name, arg_type), fn in _methods.items():
+            if class_name == declaring_class:
+                table[arg_type] = fn
+
+        def dispatch(self_, arg):
+            return table[type(arg)](self_, arg)
+
+        owner._visit_table = table
+        setattr(owner, name, dispatch)
 
 
 # The actual @visitor decorator
@@ -36,7 +55,8 @@ def visitor(arg_type):
         declaring_class = _declaring_class(fn)
         _methods[(declaring_class, arg_type)] = fn
 
-        # Replace all decorated methods with _visitor_impl
-        return _visitor_impl
+        # Replace all decorated methods with a placeholder that builds
+        # the dispatch table once the class body has been executed
+        return _VisitorMethod()
 
     return decorator
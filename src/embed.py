@@ -0,0 +1,149 @@
+"""Running Lox from Python.
+
+    lox = Lox(engine="closure")
+    result = lox.run('var greeting = "hi"; print greeting;')
+    result.output   # 'hi\\n'
+    result.status   # 0, or 65 / 70 like the command line
+
+A `Lox` owns its interpreter, globals and `Session`, and globals persist
+from one `run` to the next like they do in the REPL. Error state lives in
+the session rather than in module globals, so separate instances can run
+concurrently in threads or executors; a single instance runs one program
+at a time. Limits, see `src.limits`, are only available for the tree
+walker. Creating a `Lox` raises Python's recursion limit, see
+`src.lox.allow_deep_recursion`, so programs on every engine can nest
+calls some 4000 deep.
+
+From asyncio code, `AsyncLox` runs each program in a fresh `Lox` on a
+worker thread:
+
+    async with AsyncLox() as lox:
+        results = await asyncio.gather(*(lox.run(source) for source in sources))
+
+The natives `sleep`, `readFile` and `readLine` reach outside the program,
+so they're only defined with `io=True`, for `Lox` and `AsyncLox` alike.
+`readLine` reads the `input` passed to `run`, or else the `Lox`'s `input`
+stream, standard input by default; under `AsyncLox` it never reads
+standard input, which its programs would race for. The natives are
+coroutines: under `AsyncLox` they are awaited on the caller's event loop
+while only the program's thread waits, so up to `max_concurrency` programs
+sleeping for a second take about a second between them, and the loop stays
+free for other tasks meanwhile. A plain `Lox` runs them to completion
+itself, on a helper thread when called from inside a running loop, and a
+timeout in its limits cuts the wait short. Print writes to a buffer that's
+returned in the `Result`, so it never blocks.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from typing import TextIO
+
+from src.error_handler import Session
+from src.limits import LimitedInterpreter, Limits
+from src.lox import ENGINES, allow_deep_recursion, run
+
+
+@dataclass
+class Result:
+    # what the program printed, empty when the output went to a given stream
+    output: str
+    # compile and runtime error reports, likewise
+    errors: str
+    status: int
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 0
+
+
+class Lox:
+
+    def __init__(self, engine: str = "tree", opt_level: int = 1, limits: Limits | None = None,
+                 out: TextIO | None = None, err: TextIO | None = None, directory: Path | str | None = None,
+                 io: bool = False, input: TextIO | None = None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}.")
+        if limits is not None and engine != "tree":
+            raise ValueError("Limits are only supported by the tree engine.")
+        allow_deep_recursion()
+
+        self.opt_level = opt_level
+        # streams to write to instead of capturing into each Result
+        self.out = out
+        self.err = err
+        self.input = input
+        self.session = Session(out, err, input)
+        if limits is not None:
+            self.interpreter = LimitedInterpreter(limits, self.session)
+        else:
+            self.interpreter = ENGINES[engine](self.session)
+        if directory is not None:
+            # what `import` paths are relative to, the working directory otherwise
+            self.interpreter.directory = Path(directory).resolve()
+        if io:
+            self.interpreter.enable_io()
+
+    def run(self, source: str, directory: Path | str | None = None, input: str | None = None) -> Result:
+        """Run `source`, with imports relative to `directory` if given, and
+        `readLine` reading `input` if given."""
+        out = self.out if self.out is not None else StringIO()
+        err = self.err if self.err is not None else StringIO()
+        stream = StringIO(input) if input is not None else self.input
+        # a fresh session per run, so one run's errors don't fail the next
+        self.session = self.interpreter.session = Session(out, err, stream)
+        if directory is not None:
+            self.interpreter.directory = Path(directory).resolve()
+
+        try:
+            run(source, self.interpreter, opt_level=self.opt_level)
+        except EOFError:
+            # the program called exit()
+            pass
+
+        status = 65 if self.session.had_error else 70 if self.session.had_runtime_error else 0
+        return Result(out.getvalue() if out is not self.out else "",
+                      err.getvalue() if err is not self.err else "",
+                      status)
+
+
+class AsyncLox:
+
+    def __init__(self, engine: str = "tree", opt_level: int = 1, limits: Limits | None = None,
+                 max_concurrency: int = 64, io: bool = False):
+        # checks the arguments now rather than on the first run
+        Lox(engine, opt_level, limits)
+        self.engine = engine
+        self.opt_level = opt_level
+        self.limits = limits
+        self.io = io
+        # programs in progress at once, each holding a thread; the rest queue
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="pylox-async")
+
+    async def run(self, source: str, directory: Path | str | None = None, input: str | None = None) -> Result:
+        """Run `source` in new globals. Cancelling the call doesn't stop
+        the program, which runs on until it finishes. Without `input`,
+        `readLine` finds nothing to read."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.run_in_thread, loop, source, directory, input)
+
+    def run_in_thread(self, loop: asyncio.AbstractEventLoop, source: str, directory: Path | str | None,
+                      input: str | None) -> Result:
+        lox = Lox(self.engine, self.opt_level, self.limits, io=self.io)
+        lox.interpreter.loop = loop
+        return lox.run(source, directory, input if input is not None else "")
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncLox":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+def evaluate(source: str, engine: str = "tree", opt_level: int = 1, limits: Limits | None = None) -> Result:
+    """Run one program in a fresh `Lox` and return what it printed."""
+    return Lox(engine, opt_level, limits).run(source)
@@ -1,13 +1,12 @@
+from typing import TextIO
+
 from src.lexer.token import Token
 from src.lexer.token_type import TokenType
 
-had_error = False
-had_runtime_error = False
-
 
 class LoxRuntimeError(RuntimeError):
 
-    def __init__(self, token: Token, message: str):
+    def __init__(self, token: Token | None, message: str):
         super().__init__(message)
         self.token = token
 
@@ -16,29 +15,44 @@ class ParseError(Exception):
     pass
 
 
-def error(line: int, message: str):
-    report(line, "", message)
-
+class Session:
+    """Error state and streams of one run.
 
-def report(line: int, where: str, message: str):
-    print(f"[line {line}] Error {where}: {message}")
-    global had_error
-    had_error = True
+    The scanner, parser, resolver and engines all report through the
+    session they were given, so runs with separate sessions can go on
+    concurrently. A stream left as None means whatever `sys.stdout` (or
+    `sys.stdin`) is when it's used, which keeps `redirect_stdout` working.
+    """
 
+    def __init__(self, out: TextIO | None = None, err: TextIO | None = None, input: TextIO | None = None):
+        # program output, i.e. `print` statements
+        self.out = out
+        # compile and runtime error reports
+        self.err = err
+        # what `readLine` reads
+        self.input = input
+        self.had_error = False
+        self.had_runtime_error = False
 
-def parsing_error(token: Token, message: str):
+    def error(self, line: int, message: str):
+        self.report(line, "", message)
 
-    if token.type == TokenType.EOF:
-        report(token.line, " at end", message)
-    else:
-        report(token.line, " at '" + token.lexeme + "'", message)
+    def report(self, line: int, where: str, message: str):
+        print(f"[line {line}] Error {where}: {message}", file=self.err)
+        self.had_error = True
 
+    def parsing_error(self, token: Token, message: str):
 
-resolution_error = parsing_error
+        if token.type == TokenType.EOF:
+            self.report(token.line, " at end", message)
+        else:
+            self.report(token.line, " at '" + token.lexeme + "'", message)
 
+    resolution_error = parsing_error
 
-def runtime_error(err: LoxRuntimeError):
-    msg = " ".join(map(str, err.args))
-    print(msg + f"\n[line {err.token.line}]")
-    global had_runtime_error
-    had_runtime_error = True
+    def runtime_error(self, err: LoxRuntimeError):
+        msg = " ".join(map(str, err.args))
+        # only a limit, see src.limits, can be hit with no line to point at
+        where = f"\n[line {err.token.line}]" if err.token is not None else ""
+        print(msg + where, file=self.err)
+        self.had_runtime_error = True
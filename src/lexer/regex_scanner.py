@@ -0,0 +1,172 @@
+import re
+from sys import intern
+from typing import Iterator, List, TextIO
+
+from src.error_handler import Session
+from src.lexer.scanner import Scanner
+from src.lexer.token import Token, TokenArray
+from src.lexer.token_type import TokenType, keywords
+
+PUNCTUATION = {
+    "(": TokenType.LEFT_PAREN,
+    ")": TokenType.RIGHT_PAREN,
+    "{": TokenType.LEFT_BRACE,
+    "}": TokenType.RIGHT_BRACE,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "-": TokenType.MINUS,
+    "+": TokenType.PLUS,
+    ";": TokenType.SEMICOLON,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQUAL,
+    "=": TokenType.EQUAL,
+    "==": TokenType.EQUAL_EQUAL,
+    "<": TokenType.LESS,
+    "<=": TokenType.LESS_EQUAL,
+    ">": TokenType.GREATER,
+    ">=": TokenType.GREATER_EQUAL,
+}
+
+# Mirrors Scanner._scan_token: \d is Unicode decimal like str.isdecimal and
+# [^\W_] is exactly str.isalnum. Identifiers may only *start* with an ASCII
+# letter or underscore here; other starts, unterminated strings and stray
+# characters end up in the `other` group and go to the character scanner.
+MASTER_PATTERN = re.compile(r"""
+    (?P<space>[ \r\t\n]+)
+  | (?P<comment>//[^\n]*)
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<identifier>[A-Za-z_][^\W_]*)
+  | (?P<string>"[^"]*")
+  | (?P<punctuation>[!=<>]=?|[(){},.\-+;*/])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+class RegexScanner(Scanner):
+    """Scanner driven by a single compiled master pattern.
+
+    Produces the same tokens, lines and error reports as `Scanner`, whose
+    `_scan_token` still handles anything the pattern doesn't match.
+    """
+
+    def scan_tokens(self) -> List[Token]:
+        self.tokens = list(self.iter_tokens())
+        return self.tokens
+
+    def iter_tokens(self) -> Iterator[Token]:
+        yield from self._scan(final=True)
+        yield Token(TokenType.EOF, "", None, self.line)
+
+    def scan_token_array(self) -> TokenArray:
+        """Scan the whole source into a column-wise `TokenArray`."""
+        source = self.source
+        tokens = TokenArray(source)
+        append = tokens.append
+        line = self.line
+        pos = 0
+
+        while pos < len(source):
+            for match in MASTER_PATTERN.finditer(source, pos):
+                kind = match.lastgroup
+
+                if kind == "identifier":
+                    append(keywords.get(match.group(), TokenType.IDENTIFIER), match.start(), match.end(), line)
+                elif kind == "space":
+                    line += match.group().count("\n")
+                elif kind == "punctuation":
+                    append(PUNCTUATION[match.group()], match.start(), match.end(), line)
+                elif kind == "number":
+                    append(TokenType.NUMBER, match.start(), match.end(), line)
+                elif kind == "string":
+                    line += match.group().count("\n")
+                    append(TokenType.STRING, match.start(), match.end(), line)
+                elif kind == "other":
+                    self.start = self.current = match.start()
+                    self.line = line
+                    self._scan_token()
+                    # _scan_token adds at most one token, spanning start:current
+                    for token in self.tokens:
+                        append(token.type, self.start, self.current, token.line)
+                    self.tokens.clear()
+                    pos, line = self.current, self.line
+                    break
+            else:
+                pos = len(source)
+
+        self.start = self.current = pos
+        self.line = line
+        append(TokenType.EOF, pos, pos, line)
+        return tokens
+
+    def _scan(self, final: bool) -> Iterator[Token]:
+        """Yield the tokens in `source` from `current` onwards.
+
+        Unless `final`, stops in front of a string that isn't closed yet,
+        leaving `current` on its opening quote so more input can be added.
+        """
+        source = self.source
+        line = self.line
+        pos = self.current
+
+        while pos < len(source):
+            # finditer runs uninterrupted until the first character the
+            # pattern can't handle, which is then scanned the slow way
+            for match in MASTER_PATTERN.finditer(source, pos):
+                kind = match.lastgroup
+
+                if kind == "identifier":
+                    text = intern(match.group())
+                    yield Token(keywords.get(text, TokenType.IDENTIFIER), text, None, line)
+                elif kind == "space":
+                    line += match.group().count("\n")
+                elif kind == "punctuation":
+                    text = match.group()
+                    yield Token(PUNCTUATION[text], text, None, line)
+                elif kind == "number":
+                    text = match.group()
+                    yield Token(TokenType.NUMBER, text, float(text), line)
+                elif kind == "string":
+                    text = match.group()
+                    # the token carries the line its closing quote is on
+                    line += text.count("\n")
+                    yield Token(TokenType.STRING, text, text[1:-1], line)
+                elif kind == "other":
+                    self.start = self.current = match.start()
+                    self.line = line
+                    if not final and source[self.current] == "\"":
+                        return
+
+                    self._scan_token()
+                    yield from self.tokens
+                    self.tokens.clear()
+                    pos, line = self.current, self.line
+                    break
+            else:
+                pos = len(source)
+
+        self.start = self.current = pos
+        self.line = line
+
+
+class StreamScanner(RegexScanner):
+    """Scans a text stream line by line as it is read.
+
+    Only the current line, or a string literal still waiting for its
+    closing quote, is held in memory, so a `Parser` fed from
+    `iter_tokens` can work through input that is still arriving.
+    """
+
+    def __init__(self, stream: TextIO, session: Session | None = None):
+        super().__init__("", session)
+        self.stream = stream
+
+    def iter_tokens(self) -> Iterator[Token]:
+        for text in self.stream:
+            self.source = self.source[self.current:] + text
+            self.current = 0
+            yield from self._scan(final=False)
+
+        yield from self._scan(final=True)
+        yield Token(TokenType.EOF, "", None, self.line)
@@ -1,6 +1,7 @@
-from typing import List, Any
+from sys import intern
+from typing import Any, Iterator, List
 
-from src.error_handler import error
+from src.error_handler import Session
 from src.lexer.token import Token
 from src.lexer.token_type import TokenType, keywords
 
@@ -11,8 +12,11 @@ class Scanner:
     current: int = 0
     line: int = 1
 
-    def __init__(self, source: str):
+    def __init__(self, source: str, session: Session | None = None, line: int = 1):
         self.source = source
+        # where the source starts in its file, when it is only a part of it
+        self.line = line
+        self.session = session if session is not None else Session()
         self.tokens = []
 
     def scan_tokens(self) -> List[Token]:
@@ -23,6 +27,16 @@ class Scanner:
         self.tokens.append(Token(TokenType.EOF, "", None, self.line))
         return self.tokens
 
+    def iter_tokens(self) -> Iterator[Token]:
+        """Yield tokens one at a time instead of collecting them all."""
+        while not self._is_at_end():
+            self.start = self.current
+            self._scan_token()
+            yield from self.tokens
+            self.tokens.clear()
+
+        yield Token(TokenType.EOF, "", None, self.line)
+
     def _is_at_end(self) -> bool:
         return self.current >= len(self.source)
 
@@ -95,7 +109,7 @@ class Scanner:
                 self._identifier()
 
             case _:
-                error(self.line, f"Unexpected character {char}.")
+                self.session.error(self.line, f"Unexpected character {char}.")
 
     def _advance(self) -> str:
         next_char = self.source[self.current]
@@ -127,7 +141,7 @@ class Scanner:
             self._advance()
 
         if self._is_at_end():
-            error(self.line, "Unterminated string.")
+            self.session.error(self.line, "Unterminated string.")
             return
 
         self._advance()
@@ -160,6 +174,7 @@ class Scanner:
         while self._peek().isalnum():
             self._advance()
 
-        text = self.source[self.start: self.current]
+        # interned so that keyword and environment lookups compare by identity
+        text = intern(self.source[self.start: self.current])
         type_ = keywords.get(text, None) or TokenType.IDENTIFIER
-        self._add_token(type_)
+        self.tokens.append(Token(type_, text, None, self.line))
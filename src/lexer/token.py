@@ -1,10 +1,14 @@
-from typing import Any
+from array import array
+from sys import intern
+from typing import Any, Iterator
 
 from src.lexer.token_type import TokenType
 
 
 class Token:
 
+    __slots__ = ("type", "lexeme", "literal", "line")
+
     def __init__(self, type_: TokenType, lexeme: str, literal: Any, line: int):
         self.type = type_
         self.lexeme = lexeme
@@ -13,3 +17,56 @@ class Token:
 
     def __str__(self):
         return f"{self.type} {self.lexeme} {self.literal}"
+
+    def __reduce__(self):
+        return Token, (self.type, self.lexeme, self.literal, self.line)
+
+
+TOKEN_TYPES = tuple(TokenType)
+_TYPE_INDEX = {type_: index for index, type_ in enumerate(TOKEN_TYPES)}
+
+
+class TokenArray:
+    """Tokens stored column-wise for very large inputs.
+
+    Each token costs a type byte plus start, end and line words; the
+    lexeme and literal are only sliced out of the source when the token
+    is materialised by indexing or iteration. Identifier and keyword
+    lexemes are interned at that point like the scanners do.
+    """
+
+    __slots__ = ("source", "types", "starts", "ends", "lines")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array("B")
+        self.starts = array("I")
+        self.ends = array("I")
+        self.lines = array("I")
+
+    def append(self, type_: TokenType, start: int, end: int, line: int):
+        self.types.append(_TYPE_INDEX[type_])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        type_ = TOKEN_TYPES[self.types[index]]
+        lexeme = self.source[self.starts[index]:self.ends[index]]
+        literal = None
+
+        if type_ is TokenType.NUMBER:
+            literal = float(lexeme)
+        elif type_ is TokenType.STRING:
+            literal = lexeme[1:-1]
+        elif lexeme:
+            lexeme = intern(lexeme)
+
+        return Token(type_, lexeme, literal, self.lines[index])
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self[index]
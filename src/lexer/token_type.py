@@ -35,6 +35,7 @@ class TokenType(Enum):
     FUN = auto()
     FOR = auto()
     IF = auto()
+    IMPORT = auto()
     NIL = auto()
     OR = auto()
     PRINT = auto()
@@ -56,6 +57,7 @@ keywords: Dict[str, TokenType] = {
     "for": TokenType.FOR,
     "fun": TokenType.FUN,
     "if": TokenType.IF,
+    "import": TokenType.IMPORT,
     "nil": TokenType.NIL,
     "or": TokenType.OR,
     "print": TokenType.PRINT,
@@ -0,0 +1,132 @@
+"""Resource limits for running untrusted programs in the tree walker.
+
+    interpreter = LimitedInterpreter(Limits(max_steps=1_000_000, timeout=2.0))
+    interpreter.interpret(statements)
+
+Every limit applies to one `interpret` call. Going over one raises
+`LimitExceeded`, a `LoxRuntimeError`, which `interpret` reports like any
+other runtime error. The unlimited `Interpreter` pays nothing for this.
+"""
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Coroutine, List
+
+from src.asts.syntax_trees import Call, Stmt
+from src.common.environment import Environment
+from src.common.visitor import visitor
+from src.error_handler import LoxRuntimeError, Session
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.parser.interpreter import Interpreter
+from src.parser.native_functions import NativeError, run_coroutine
+
+# statements run between checks of the clock
+CHECK_INTERVAL = 1024
+
+
+@dataclass(frozen=True)
+class Limits:
+    # statements executed
+    max_steps: int | None = None
+    # wall clock seconds
+    timeout: float | None = None
+    # nested calls, tail calls don't nest
+    max_call_depth: int | None = None
+    # block and function environments allocated
+    max_environments: int | None = None
+
+
+class LimitExceeded(LoxRuntimeError):
+    pass
+
+
+def _line_of(stmt: Stmt) -> Token | None:
+    """A token to report an error at a statement's first line, or None if
+    the statement wasn't parsed from source and so has no span."""
+    if stmt.span is None:
+        return None
+    return Token(TokenType.IDENTIFIER, "", None, stmt.span[0])
+
+
+_visit_call = Interpreter._visit_table[Call]
+
+
+class LimitedInterpreter(Interpreter):
+
+    def __init__(self, limits: Limits, session: Session | None = None):
+        super().__init__(session)
+        self.limits = limits
+        # statements executed up to the last check, and since then: of the
+        # `granted` statements allowed between checks, `budget` are left
+        self.steps = 0
+        self.granted = 0
+        self.budget = 0
+        self.deadline: float | None = None
+        self.depth = 0
+        self.environments = 0
+
+    @property
+    def steps_taken(self) -> int:
+        return self.steps + self.granted - self.budget
+
+    def interpret(self, statements: List[Stmt]):
+        limits = self.limits
+        self.steps = self.depth = self.environments = 0
+        self.deadline = perf_counter() + limits.timeout if limits.timeout is not None else None
+        self.refill()
+        super().interpret(statements)
+
+    def refill(self):
+        grant = CHECK_INTERVAL
+        if self.limits.max_steps is not None:
+            # so the check lands exactly on the first step over the limit
+            grant = min(grant, self.limits.max_steps - self.steps + 1)
+        self.budget = self.granted = grant
+
+    def execute(self, stmt: Stmt):
+        self.budget -= 1
+        if self.budget <= 0:
+            self.check(stmt)
+        # noinspection PyTypeChecker
+        return self.visit(stmt)
+
+    def check(self, stmt: Stmt):
+        """The slow path of `execute`, run once the budget is spent."""
+        self.steps += self.granted
+        self.budget = self.granted = 0
+        limits = self.limits
+
+        if limits.max_steps is not None and self.steps > limits.max_steps:
+            raise LimitExceeded(_line_of(stmt), f"Step limit of {limits.max_steps} exceeded.")
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise LimitExceeded(_line_of(stmt), f"Timeout of {limits.timeout} seconds exceeded.")
+
+        self.refill()
+
+    def execute_block(self, statements: List[Stmt], environ: Environment):
+        self.environments += 1
+        limit = self.limits.max_environments
+        if limit is not None and self.environments > limit and statements:
+            raise LimitExceeded(_line_of(statements[0]), f"Environment limit of {limit} exceeded.")
+
+        return super().execute_block(statements, environ)
+
+    def wait(self, coroutine: Coroutine) -> Any:
+        # a script waiting on a native is still running out its time
+        if self.deadline is None:
+            return super().wait(coroutine)
+        try:
+            return run_coroutine(coroutine, self.loop, max(self.deadline - perf_counter(), 0.0))
+        except TimeoutError:
+            raise NativeError(f"Timeout of {self.limits.timeout} seconds exceeded.") from None
+
+    @visitor(Call)
+    def visit(self, expr: Call):
+        self.depth += 1
+        try:
+            limit = self.limits.max_call_depth
+            if limit is not None and self.depth > limit:
+                raise LimitExceeded(expr.paren, "Stack overflow.")
+            return _visit_call(self, expr)
+        finally:
+            self.depth -= 1
@@ -1,69 +1,286 @@
+from contextlib import nullcontext
+from importlib import import_module
 from pathlib import Path
-from sys import argv, exit
+from sys import argv, exit, getrecursionlimit, setrecursionlimit, stderr, stdin
+from threading import stack_size
+from typing import Iterable, List, TextIO
 
-from src import error_handler
-from src.lexer.scanner import Scanner
+from src.asts.syntax_trees import Stmt
+from src.closure.interpreter import ClosureInterpreter
+from src.error_handler import Session
+from src.lexer.regex_scanner import RegexScanner, StreamScanner
+from src.lexer.token import Token
 from src.parser.interpreter import Interpreter
+from src.parser.optimizer import Optimizer
 from src.parser.rec_des_parser import Parser
 from src.parser.resolver import Resolver
+from src.metrics import InstrumentedInterpreter, Metrics, count_call_caches, count_nodes, counted, timed
+from src.parallel_parse import parse_source
+from src.profiler import ProfilingInterpreter, SamplingProfiler
+from src.program_cache import ProgramCache
+from src.vm.vm import VM
 
 PATHLIKE = Path | str
 DEBUG_MODE = False
+DEFAULT_PROFILE = "pylox.folded"
+# a Lox call takes about 12 Python frames in the tree walker and 5 in the
+# closure engine, so at this limit both nest at least as deep as the VM's
+# 4096 frames before reporting a stack overflow
+RECURSION_LIMIT = 50_000
+# calls through natives such as memoize use the C stack too, a few hundred
+# bytes a level, which the 8 MiB a main thread usually gets covers
+THREAD_STACK_SIZE = 32 * 1024 * 1024
+
+ENGINES = {
+    "tree": Interpreter,
+    "vm": VM,
+    "closure": ClosureInterpreter,
+}
+
+SUBCOMMANDS = {
+    "bench": "src.bench",
+    "run-many": "src.run_many",
+    "serve": "src.server",
+    "client": "src.client",
+}
+
+
+def allow_deep_recursion():
+    """Raise Python's recursion limit to RECURSION_LIMIT, and the stack size
+    of threads started from now on to match. Every entry point calls this."""
+    if getrecursionlimit() < RECURSION_LIMIT:
+        setrecursionlimit(RECURSION_LIMIT)
+    if stack_size() < THREAD_STACK_SIZE:
+        stack_size(THREAD_STACK_SIZE)
 
 
 def main(args):
-    interpreter = Interpreter()
-    if len(args) > 2:
-        print("Usage: pylox [script]")
+    allow_deep_recursion()
+    if len(args) > 1 and args[1] in SUBCOMMANDS:
+        exit(import_module(SUBCOMMANDS[args[1]]).main(args[2:]))
+
+    engine = "tree"
+    use_cache = True
+    opt_level = 1
+    profile_path = None
+    sample = False
+    stats_path = None
+    parse_jobs = 1
+    io = False
+    scripts = []
+    for arg in args[1:]:
+        if arg.startswith("--engine="):
+            engine = arg.removeprefix("--engine=")
+        elif arg == "--no-cache":
+            use_cache = False
+        elif arg in ("-O0", "-O1"):
+            opt_level = int(arg[2:])
+        elif arg == "--profile" or arg.startswith("--profile="):
+            profile_path = arg.partition("=")[2] or DEFAULT_PROFILE
+        elif arg == "--sample":
+            sample = True
+        elif arg == "--stats" or arg.startswith("--stats="):
+            stats_path = arg.partition("=")[2]
+        elif arg.startswith("--parse-jobs="):
+            value = arg.removeprefix("--parse-jobs=")
+            # anything but a positive count is a usage error below
+            parse_jobs = int(value) if value.isdecimal() and int(value) > 0 else None
+        elif arg == "--io":
+            io = True
+        else:
+            scripts.append(arg)
+
+    # the profiler hooks into the tree walker, and so do the runtime counters
+    # of --stats, which is why the two can't be combined
+    if sample and profile_path is None:
+        profile_path = DEFAULT_PROFILE
+    profiling = profile_path is not None
+    if (len(scripts) > 1 or engine not in ENGINES or parse_jobs is None
+            or (profiling and (engine != "tree" or stats_path is not None))):
+        print(f"Usage: pylox [--engine={'|'.join(ENGINES)}] [--no-cache] [-O0|-O1] [--parse-jobs=N] [--io] "
+              f"[--profile[=FILE] [--sample] | --stats[=FILE]] [script | -]")
         exit(64)
-    elif len(args) == 2:
-        run_file(args[1], interpreter)
-        if error_handler.had_error:
+
+    session = Session()
+    metrics = Metrics() if stats_path is not None else None
+    profiler = None
+    if profiling and sample:
+        # samples a plain tree walker rather than instrumenting one
+        interpreter = Interpreter(session)
+        profiler = SamplingProfiler()
+    elif profiling:
+        interpreter = profiler = ProfilingInterpreter(session)
+    elif metrics is not None and engine == "tree":
+        interpreter = InstrumentedInterpreter(metrics, session)
+    else:
+        interpreter = ENGINES[engine](session)
+    if io:
+        interpreter.enable_io()
+
+    if scripts:
+        with sampled(profiler):
+            if scripts[0] == "-":
+                run_stream(stdin, interpreter, opt_level, metrics)
+            else:
+                cache = ProgramCache.for_script(scripts[0]) if use_cache else None
+                run_file(scripts[0], interpreter, cache, opt_level, metrics, parse_jobs)
+        if profiling:
+            write_profile(profiler, profile_path)
+        if metrics is not None:
+            write_stats(metrics, stats_path)
+        if session.had_error:
             exit(65)
-        if error_handler.had_runtime_error:
+        if session.had_runtime_error:
             exit(70)
     else:
-        run_prompt(interpreter)
+        with sampled(profiler):
+            run_prompt(interpreter, opt_level, metrics)
+        if profiling:
+            write_profile(profiler, profile_path)
+        if metrics is not None:
+            write_stats(metrics, stats_path)
+
+
+def sampled(profiler: ProfilingInterpreter | SamplingProfiler | None):
+    """Sample the block if `profiler` is a sampling one."""
+    return profiler.sampling() if isinstance(profiler, SamplingProfiler) else nullcontext()
+
+
+def write_profile(profiler: ProfilingInterpreter | SamplingProfiler, path: PATHLIKE):
+    """Print the flat profile to stderr and save the collapsed stacks to `path`."""
+    profiler.write_report()
+    with open(path, "w") as out:
+        profiler.write_collapsed(out)
+    print(f"\nCollapsed stacks written to {path}", file=stderr)
+
+
+def write_stats(metrics: Metrics, path: PATHLIKE):
+    """Print the metrics to stderr, or save them as JSON if given a path."""
+    if not path:
+        metrics.write()
+        return
+
+    with open(path, "w") as out:
+        metrics.write_json(out)
 
 
-def run_file(script_path: PATHLIKE, interp: Interpreter):
+def run_file(script_path: PATHLIKE, interp: Interpreter | VM | ClosureInterpreter, cache: ProgramCache | None = None,
+             opt_level: int = 1, metrics: Metrics | None = None, parse_jobs: int = 1):
 
+    # imports in the script are relative to it
+    interp.directory = Path(script_path).resolve().parent
     try:
         with open(script_path, "r") as infile:
             script = infile.read()
-            run(script, interp)
+            run(script, interp, cache, opt_level, metrics, parse_jobs)
     except FileNotFoundError:
         print(f"error: File at {script_path} wasn't found.")
 
 
-def run_prompt(interp: Interpreter):
+def run_stream(stream: TextIO, interp: Interpreter | VM | ClosureInterpreter, opt_level: int = 1,
+               metrics: Metrics | None = None):
+    """Run a program that is parsed as it is read, e.g. from a pipe."""
+    tokens = StreamScanner(stream, interp.session).iter_tokens()
+    if metrics is not None:
+        tokens = counted(tokens, metrics)
+
+    # scanning happens as the parser asks for tokens, so it can't be timed apart
+    statements = parse_and_resolve(tokens, interp.session, metrics, "scan+parse")
+    if statements is not None:
+        execute(statements, interp, opt_level, metrics)
+
+
+def run_prompt(interp: Interpreter | VM | ClosureInterpreter, opt_level: int = 1, metrics: Metrics | None = None):
 
     while True:
         try:
             line = input("> ")
-            run(line, interp)
-            error_handler.had_error = False
+            run(line, interp, opt_level=opt_level, metrics=metrics)
+            interp.session.had_error = False
         except EOFError:
             print("\nThe only way to learn a new programming language is by writing programs in it. - K&R")
             break
 
 
-def run(source: str, interp: Interpreter):
-    tokens = Scanner(source).scan_tokens()
-    parser = Parser(tokens)
-    statements = parser.parse()
+def run(source: str, interp: Interpreter | VM | ClosureInterpreter, cache: ProgramCache | None = None,
+        opt_level: int = 1, metrics: Metrics | None = None, parse_jobs: int = 1):
+    statements = None
+    if cache is not None:
+        with timed(metrics, "cache load"):
+            statements = cache.load(source)
+
+    if statements is None and parse_jobs > 1:
+        # None for small or broken programs, which the plain front end handles
+        with timed(metrics, "parallel front end"):
+            statements = parse_source(source, parse_jobs)
+        if statements is not None and cache is not None:
+            with timed(metrics, "cache store"):
+                cache.store(source, statements)
+
+    if statements is None:
+        if metrics is None:
+            tokens = RegexScanner(source, interp.session).iter_tokens()
+        else:
+            # scanned up front so that scanning is timed on its own
+            with metrics.phase("scan"):
+                tokens = RegexScanner(source, interp.session).scan_tokens()
+            metrics.tokens += len(tokens)
+
+        statements = parse_and_resolve(tokens, interp.session, metrics)
+        if statements is None:
+            return
+
+        if cache is not None:
+            with timed(metrics, "cache store"):
+                cache.store(source, statements)
+    elif metrics is not None:
+        metrics.nodes += count_nodes(statements)
+
+    execute(statements, interp, opt_level, metrics)
 
-    if error_handler.had_error:
-        return
 
-    resolver = Resolver(interp)
-    resolver.resolve(statements)
+def parse_and_resolve(tokens: Iterable[Token], session: Session, metrics: Metrics | None = None,
+                      parse_phase: str = "parse") -> List[Stmt] | None:
+    """Run the front end, returning None if it reported any errors."""
+    parser = Parser(tokens, session)
+    with timed(metrics, parse_phase):
+        statements = parser.parse()
+
+    if session.had_error:
+        return None
+
+    resolver = Resolver(session)
+    with timed(metrics, "resolve"):
+        resolver.resolve(statements)
 
     # handle resolution errors
-    if error_handler.had_error:
-        return
+    if session.had_error:
+        return None
+
+    if metrics is not None:
+        metrics.nodes += count_nodes(statements)
+        metrics.scopes += resolver.scope_count
+    return statements
+
+
+def execute(statements: List[Stmt], interp: Interpreter | VM | ClosureInterpreter, opt_level: int,
+            metrics: Metrics | None = None):
+    with timed(metrics, "optimize"):
+        statements = optimize(statements, opt_level)
+    # modules the program imports are optimized at the same level
+    interp.opt_level = opt_level
+    with timed(metrics, "execute"):
+        interp.interpret(statements)
+    if metrics is not None and metrics.call_sites is not None:
+        count_call_caches(statements, metrics)
+
+
+def optimize(statements: List[Stmt], opt_level: int) -> List[Stmt]:
+    # runs after the cache so cached programs don't depend on the level
+    if opt_level >= 1:
+        return Optimizer().optimize(statements)
 
-    interp.interpret(statements)
+    return statements
 
 
 if __name__ == "__main__":
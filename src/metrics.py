@@ -0,0 +1,160 @@
+"""Counters and per-phase timings for a run (`pylox --stats`).
+
+`src.lox.run` fills a `Metrics` when it is given one: the time spent in
+each phase, the tokens scanned, the AST's size and the resolver's scope
+count. The runtime counters need the tree walker and come from
+`InstrumentedInterpreter`; the plain `Interpreter` doesn't pay for them.
+The inline cache counts are read off the program's Call nodes after it
+has run, see `count_call_caches`.
+"""
+import json
+import sys
+from contextlib import contextmanager, nullcontext
+from dataclasses import MISSING, asdict, dataclass, field, fields
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
+
+from src.asts.syntax_trees import Call, Node, Return, Stmt
+from src.common.environment import Environment
+from src.common.visitor import visitor
+from src.error_handler import Session
+from src.lexer.token import Token
+from src.parser.interpreter import Interpreter
+
+
+@dataclass
+class Metrics:
+    # seconds, keyed by phase in the order the phases first ran
+    phases: Dict[str, float] = field(default_factory=dict)
+    tokens: int = 0
+    nodes: int = 0
+    scopes: int = 0
+    # counted by InstrumentedInterpreter only, None for other engines
+    statements: int | None = None
+    environments: int | None = None
+    calls: int | None = None
+    # Call sites run and their inline cache hits and misses, also tree walker only
+    call_sites: int | None = None
+    cache_hits: int | None = None
+    cache_misses: int | None = None
+
+    @contextmanager
+    def phase(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + perf_counter() - start
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        scanning = self.phases.get("scan") or self.phases.get("scan+parse")
+        return self.tokens / scanning if self.tokens and scanning else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result["tokens_per_second"] = self.tokens_per_second
+        return result
+
+    def write(self, out: TextIO = sys.stderr):
+        for name, seconds in self.phases.items():
+            print(f"{name + ' ms':<20}{seconds * 1e3:>14.2f}", file=out)
+
+        rate = self.tokens_per_second
+        counters = {
+            "tokens": self.tokens,
+            "tokens/sec": round(rate) if rate is not None else None,
+            "AST nodes": self.nodes,
+            "scopes": self.scopes,
+            "statements": self.statements,
+            "environments": self.environments,
+            "calls": self.calls,
+            "call sites": self.call_sites,
+            "cache hits": self.cache_hits,
+            "cache misses": self.cache_misses,
+        }
+        for name, value in counters.items():
+            print(f"{name:<20}{value if value is not None else 'n/a':>14}", file=out)
+
+    def write_json(self, out: TextIO):
+        json.dump(self.as_dict(), out, indent=2)
+        out.write("\n")
+
+
+def timed(metrics: Metrics | None, name: str):
+    """`metrics.phase(name)`, or a no-op when there are no metrics."""
+    return metrics.phase(name) if metrics is not None else nullcontext()
+
+
+def counted(tokens: Iterable[Token], metrics: Metrics) -> Iterator[Token]:
+    for token in tokens:
+        metrics.tokens += 1
+        yield token
+
+
+def count_nodes(statements: List[Stmt]) -> int:
+    """Number of nodes in the trees, following only the fields the parser
+    sets; the ones with defaults hold annotations and caches."""
+    count = 0
+    pending: List[Any] = list(statements)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, Node):
+            count += 1
+            pending.extend(getattr(node, f.name) for f in fields(node) if f.default is MISSING)
+
+    return count
+
+
+def count_call_caches(statements: List[Stmt], metrics: Metrics):
+    """Add up the inline cache counts of the Call nodes in the trees that
+    the tree walker has run."""
+    pending: List[Any] = list(statements)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, list):
+            pending.extend(node)
+        elif isinstance(node, Node):
+            if type(node) is Call and (node.hits or node.misses):
+                metrics.call_sites += 1
+                metrics.cache_hits += node.hits
+                metrics.cache_misses += node.misses
+            pending.extend(getattr(node, f.name) for f in fields(node) if f.default is MISSING)
+
+
+_visit_call = Interpreter._visit_table[Call]
+_visit_return = Interpreter._visit_table[Return]
+
+
+class InstrumentedInterpreter(Interpreter):
+    """Counts statements executed, environments allocated and calls made."""
+
+    def __init__(self, metrics: Metrics, session: Session | None = None):
+        super().__init__(session)
+        self.metrics = metrics
+        metrics.statements = metrics.environments = metrics.calls = 0
+        metrics.call_sites = metrics.cache_hits = metrics.cache_misses = 0
+
+    def execute(self, stmt: Stmt):
+        self.metrics.statements += 1
+        # noinspection PyTypeChecker
+        return self.visit(stmt)
+
+    def execute_block(self, statements: List[Stmt], environ: Environment):
+        # blocks and function bodies all get their fresh environment here
+        self.metrics.environments += 1
+        return super().execute_block(statements, environ)
+
+    @visitor(Call)
+    def visit(self, expr: Call):
+        self.metrics.calls += 1
+        return _visit_call(self, expr)
+
+    @visitor(Return)
+    def visit(self, stmt: Return):
+        # `return f(...)` makes its call here, as a tail call or directly
+        if type(stmt.value) is Call:
+            self.metrics.calls += 1
+        return _visit_return(self, stmt)
@@ -0,0 +1,111 @@
+"""Modules for `import "path";`.
+
+A module is a Lox file run in a global environment of its own, with paths
+relative to the importing file. The first import in a process loads it:
+the front end runs once, or not at all when the program cache next to the
+module already has its source, and the module's top level is executed.
+Every later import only checks that the file hasn't changed and binds the
+importer's globals to the module's cells, which takes microseconds. The
+names are shared, not copied, so an assignment on either side is seen by
+both, and a module's functions keep using the module's own globals.
+
+Engines keep one `ModuleCache` per family, as the values in a module's
+globals are that engine's functions, unless an interpreter is given its
+own `modules`, as `pylox serve` does to isolate requests. An engine provides `session`,
+`opt_level`, `define_natives(globals_)` and
+`run_module(statements, globals_, directory)`. A module is optimized at
+the level of the importer that loads it first.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from threading import RLock
+from typing import Dict, List, Set, Tuple
+
+from src.asts.syntax_trees import Stmt
+from src.common.environment import GlobalCell, GlobalEnvironment
+from src.error_handler import LoxRuntimeError, Session
+from src.lexer.regex_scanner import RegexScanner
+from src.lexer.token import Token
+from src.parser.rec_des_parser import Parser
+from src.parser.resolver import Resolver
+from src.program_cache import ProgramCache
+
+
+@dataclass
+class Module:
+    path: Path
+    # the file's mtime and size when it was loaded
+    stamp: Tuple[int, int]
+    globals: GlobalEnvironment
+    # the module's top-level names, without the natives every environment has
+    exports: Dict[str, GlobalCell]
+
+
+class ModuleCache:
+
+    def __init__(self):
+        self.modules: Dict[Path, Module] = {}
+        # modules whose top level is running, to catch circular imports
+        self.loading: Set[Path] = set()
+        # held while a module loads, so concurrent importers load it once
+        self.lock = RLock()
+
+    def load(self, keyword: Token, name: str, directory: Path, engine) -> Module:
+        path = (directory / name).resolve()
+        with self.lock:
+            try:
+                stat = path.stat()
+            except OSError:
+                raise LoxRuntimeError(keyword, f"Can't find module '{name}'.") from None
+
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            module = self.modules.get(path)
+            if module is not None and module.stamp == stamp:
+                return module
+
+            if path in self.loading:
+                raise LoxRuntimeError(keyword, f"Circular import of '{name}'.")
+
+            self.loading.add(path)
+            try:
+                statements = compile_module(keyword, name, path, engine.session, engine.opt_level)
+
+                globals_ = GlobalEnvironment()
+                engine.define_natives(globals_)
+                natives = set(globals_.cells)
+                engine.run_module(statements, globals_, path.parent)
+
+                exports = {export: cell for export, cell in globals_.cells.items() if export not in natives}
+                module = self.modules[path] = Module(path, stamp, globals_, exports)
+            finally:
+                self.loading.discard(path)
+
+            return module
+
+
+def compile_module(keyword: Token, name: str, path: Path, session: Session, opt_level: int) -> List[Stmt]:
+    """The module's resolved statements, from the program cache if it has
+    them, optimized if `opt_level` is 1. Errors are reported to `session`'s
+    stream and fail the import."""
+    # the optimizer needs the tree walker, which needs this module
+    from src.parser.optimizer import Optimizer
+
+    try:
+        source = path.read_text()
+    except OSError:
+        raise LoxRuntimeError(keyword, f"Can't read module '{name}'.") from None
+
+    cache = ProgramCache.for_script(path)
+    statements = cache.load(source)
+    if statements is None:
+        # the module's errors don't count as the importer's compile errors
+        module_session = Session(session.out, session.err)
+        statements = Parser(RegexScanner(source, module_session).iter_tokens(), module_session).parse()
+        if not module_session.had_error:
+            Resolver(module_session).resolve(statements)
+        if module_session.had_error:
+            raise LoxRuntimeError(keyword, f"Errors in module '{name}'.")
+
+        cache.store(source, statements)
+
+    return Optimizer().optimize(statements) if opt_level >= 1 else statements
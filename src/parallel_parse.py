@@ -0,0 +1,131 @@
+"""Scanning, parsing and resolving in worker processes.
+
+The front end is a pure function of the source text, and at the top level
+the resolver has no scope to carry from one statement to the next, so a
+set of files, or one big file cut between top-level statements, can be
+handled independently. Each worker runs `RegexScanner`, `Parser` and
+`Resolver` on its part and sends back the pickled statements, which the
+calling process joins in source order.
+
+Error reporting is left to the sequential front end: when any part has an
+error, the functions here return None and the caller parses again, so
+the reports come out exactly as they always do.
+"""
+import pickle
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+from typing import Iterable, List
+
+from src.asts.syntax_trees import Stmt
+from src.error_handler import Session
+from src.lexer.regex_scanner import RegexScanner
+from src.parser.rec_des_parser import Parser
+from src.parser.resolver import Resolver
+from src.program_cache import unpickle
+
+# below this many characters a part isn't worth a process
+MIN_PART_SIZE = 32 * 1024
+
+_ELSE = re.compile(r"(?:\s|//[^\n]*)*else\b")
+
+
+@dataclass
+class Part:
+    # where the text starts in its file
+    line: int
+    text: str
+
+
+def split_declarations(source: str, parts: int) -> List[Part]:
+    """Cut `source` into at most `parts` pieces of similar size, only ever
+    after a `;` or `}` that ends a top-level statement."""
+    if parts < 2:
+        return [Part(1, source)]
+
+    target = len(source) // parts
+    pieces = []
+    start, start_line = 0, 1
+    line = 1
+    depth = 0
+    pos = 0
+
+    while pos < len(source) and len(pieces) < parts - 1:
+        char = source[pos]
+        if char == "\n":
+            line += 1
+        elif char == '"':
+            end = source.find('"', pos + 1)
+            if end == -1:
+                break
+            line += source.count("\n", pos, end)
+            pos = end
+        elif char == "/" and source.startswith("//", pos):
+            end = source.find("\n", pos)
+            if end == -1:
+                break
+            pos = end
+            continue
+        elif char in "({":
+            depth += 1
+        elif char in ")}":
+            depth -= 1
+            if depth < 0:
+                # unbalanced, leave the rest to the parser in one piece
+                break
+
+        if char in ";}" and depth == 0 and pos + 1 - start >= target and not _ELSE.match(source, pos + 1):
+            pieces.append(Part(start_line, source[start:pos + 1]))
+            start, start_line = pos + 1, line
+        pos += 1
+
+    pieces.append(Part(start_line, source[start:]))
+    return pieces
+
+
+def front_end(text: str, line: int = 1) -> bytes | None:
+    """Scan, parse and resolve `text`, returning the pickled statements, or
+    None if there were errors."""
+    session = Session(err=StringIO())
+    statements = Parser(RegexScanner(text, session, line).iter_tokens(), session).parse()
+    if session.had_error:
+        return None
+
+    Resolver(session).resolve(statements)
+    if session.had_error:
+        return None
+
+    try:
+        return pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)
+    except (RecursionError, pickle.PicklingError):
+        return None
+
+
+def run_parts(parts: List[Part], jobs: int) -> List[List[Stmt] | None]:
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(front_end, [part.text for part in parts], [part.line for part in parts])
+        return [unpickle(data) if data is not None else None for data in results]
+
+
+def parse_source(source: str, jobs: int) -> List[Stmt] | None:
+    """The resolved statements of one program, or None when it's too small
+    to split or has errors."""
+    parts = split_declarations(source, min(jobs, len(source) // MIN_PART_SIZE))
+    if len(parts) < 2:
+        return None
+
+    statements = []
+    for part in run_parts(parts, jobs):
+        if part is None:
+            return None
+        statements.extend(part)
+
+    return statements
+
+
+def parse_files(paths: Iterable[Path | str], jobs: int) -> List[List[Stmt] | None]:
+    """The resolved statements of each file, None for the ones with errors."""
+    parts = [Part(1, Path(path).read_text()) for path in paths]
+    return run_parts(parts, jobs)
@@ -1,40 +1,62 @@
-from typing import Any, List
+import asyncio
+from pathlib import Path
+from typing import Any, Coroutine, List, Tuple
 
 from src.asts.syntax_trees import (Literal, Grouping, Expr, Unary, Binary,
                                    Expression, Print, Stmt, Var, Variable,
-                                   Assign, Block, If, Logical, While, Call, Function, Return)
-from src.common.environment import Environment
+                                   Assign, Block, If, Logical, While, Call, Function, Return, Import)
+from src.common.environment import Environment, GlobalEnvironment
 from src.common.lox_callable import LoxCallable
 from src.common.lox_function import LoxFunction
-from src.common.return_unwind import ReturnUnwind
+from src.common.completion import NIL_RETURN, TailCall
 from src.common.visitor import visitor
-from src.error_handler import LoxRuntimeError, runtime_error
+from src.error_handler import LoxRuntimeError, Session
 from src.lexer.token import Token
 from src.lexer.token_type import TokenType
-from src.parser.native_functions import NativeClock
+from src.modules import ModuleCache
+from src.parser.native_functions import IO_NATIVES, NativeError, define_natives, run_coroutine
 
 
 class Interpreter:
 
-    def __init__(self):
-        self.globals = Environment()
-        self.environment = self.globals
-        self.locals = {}
+    # shared by every tree walker in the process, see src.modules
+    modules = ModuleCache()
 
-        self.globals.define("clock", NativeClock())
-        self.globals.define("exit", type("_exit_lc", (LoxCallable,), {
-            # Generator throw: https://stackoverflow.com/a/8294654
-            "call": lambda *args: (_ for _ in ()).throw(EOFError),
-            "arity": lambda _: 0,
-            "__str__": lambda _: "<native fn>"
-        })())
+    def __init__(self, session: Session | None = None):
+        self.session = session if session is not None else Session()
+        self.globals = GlobalEnvironment()
+        self.environment = self.globals
+        # what `import` paths are relative to
+        self.directory = Path.cwd()
+        # what imported modules are optimized at, see src.lox.execute
+        self.opt_level = 1
+        # the event loop async natives run on, see src.embed.AsyncLox
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # whether scripts may use sleep, readFile and readLine, see enable_io
+        self.io = False
+
+        self.define_natives(self.globals)
+
+    def define_natives(self, globals_: GlobalEnvironment):
+        define_natives(globals_, self.io)
+
+    def enable_io(self):
+        """Give the program, and modules this interpreter loads from now on,
+        the natives that sleep and read files and standard input."""
+        self.io = True
+        for name, native in IO_NATIVES.items():
+            self.globals.define(name, native())
+
+    def wait(self, coroutine: Coroutine) -> Any:
+        """Run an async native's coroutine, see `AsyncNative`."""
+        return run_coroutine(coroutine, self.loop)
 
     def interpret(self, statments: List[Stmt]):
         try:
             for statement in statments:
                 self.execute(statement)
         except LoxRuntimeError as err:
-            runtime_error(err)
+            self.session.runtime_error(err)
 
     def execute(self, stmt: Stmt):
         # noinspection PyTypeChecker
@@ -42,40 +64,77 @@ class Interpreter:
 
     def execute_block(self, statements: List[Stmt], environ: Environment):
 
-        previous: Environment = self.environment
+        previous: Environment | GlobalEnvironment = self.environment
         try:
             self.environment = environ
 
             for stmt in statements:
-                self.execute(stmt)
+                completion = self.execute(stmt)
+                if completion is not None:
+                    return completion
         finally:
             self.environment = previous
 
+        return None
+
+    def run_body(self, function: LoxFunction, arguments: List[Any]):
+        """One run of a function's body, for `LoxFunction.call`. The argument
+        list becomes the frame, since parameters occupy its first slots."""
+        declaration = function.declaration
+        arguments.extend([None] * (declaration.size - len(arguments)))
+        if function.globals is self.globals:
+            return self.execute_block(declaration.body, Environment(function.closure, arguments))
+        return self.execute_in_module(function.globals, declaration.body, Environment(function.closure, arguments))
+
+    def execute_in_module(self, globals_: GlobalEnvironment, statements: List[Stmt], environ: Environment):
+        """`execute_block` for the body of a function from another module,
+        whose globals are the ones it was declared with."""
+        previous = self.globals
+        self.globals = globals_
+        try:
+            return self.execute_block(statements, environ)
+        finally:
+            self.globals = previous
+
+    def run_module(self, statements: List[Stmt], globals_: GlobalEnvironment, directory: Path):
+        previous = self.globals, self.environment, self.directory
+        self.globals = self.environment = globals_
+        self.directory = directory
+        try:
+            for statement in statements:
+                self.execute(statement)
+        finally:
+            self.globals, self.environment, self.directory = previous
+
     def evaluate(self, expr: Expr):
         # noinspection PyTypeChecker
         return self.visit(expr)
 
-    def resolve(self, expr: Expr, depth: int):
-        self.locals[expr] = depth
-
     @visitor(Return)
     def visit(self, stmt: Return):
-        value = None
-        if stmt.value is not None:
-            value = self.evaluate(stmt.value)
+        if stmt.value is None:
+            return NIL_RETURN
+
+        if type(stmt.value) is Call:
+            function, arguments = self.prepare_call(stmt.value)
+            if isinstance(function, LoxFunction):
+                return TailCall(function, arguments)
+            return (self.call_native(stmt.value, function, arguments),)
 
-        raise ReturnUnwind(value)
+        return (self.evaluate(stmt.value),)
 
     @visitor(Function)
     def visit(self, stmt: Function):
-        function: LoxFunction = LoxFunction(stmt, self.environment)
-        self.environment.define(stmt.name.lexeme, function)
+        function: LoxFunction = LoxFunction(stmt, self.environment, self.globals)
+        if stmt.slot is None:
+            self.globals.define(stmt.name.lexeme, function)
+        else:
+            self.environment.define(stmt.slot, function)
         return None
 
     @visitor(Block)
     def visit(self, stmt: Block):
-        self.execute_block(stmt.statements, Environment(encl=self.environment))
-        return None
+        return self.execute_block(stmt.statements, Environment(self.environment, [None] * stmt.size))
 
     @visitor(Expression)
     def visit(self, stmt: Expression):
@@ -85,16 +144,22 @@ class Interpreter:
     @visitor(If)
     def visit(self, stmt: If):
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.then_branch)
+            return self.execute(stmt.then_branch)
         elif stmt.else_branch is not None:
-            self.execute(stmt.else_branch)
+            return self.execute(stmt.else_branch)
+
+        return None
 
+    @visitor(Import)
+    def visit(self, stmt: Import):
+        module = self.modules.load(stmt.keyword, stmt.path.literal, self.directory, self)
+        self.globals.bind(module.exports)
         return None
 
     @visitor(Print)
     def visit(self, stmt: Print):
         value = self.evaluate(stmt.expression)
-        print(self.stringify(value))
+        print(self.stringify(value), file=self.session.out)
         return None
 
     @visitor(Var)
@@ -103,14 +168,19 @@ class Interpreter:
         if stmt.initializer is not None:
             value = self.evaluate(stmt.initializer)
 
-        self.environment.define(stmt.name.lexeme, value)
+        if stmt.slot is None:
+            self.globals.define(stmt.name.lexeme, value)
+        else:
+            self.environment.define(stmt.slot, value)
         return None
 
     @visitor(While)
     def visit(self, stmt: While):
 
         while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            completion = self.execute(stmt.body)
+            if completion is not None:
+                return completion
 
         return None
 
@@ -118,28 +188,30 @@ class Interpreter:
     def visit(self, expr: Assign):
         value = self.evaluate(expr.value)
 
-        try:
-            distance = self.locals.get(expr, None)
-        except TypeError:
-            distance = None
-
+        distance = expr.depth
         if distance is not None:
-            self.environment.assign_at(distance, expr.name, value)
-        else:
-            self.globals.assign(expr.name, value)
-
+            self.environment.assign_at(distance, expr.slot, value)
+            return value
+
+        globals_ = self.globals
+        if expr.version != globals_.version:
+            expr.cell = globals_.cell(expr.name)
+            expr.version = globals_.version
+        expr.cell.value = value
         return value
 
     @visitor(Variable)
     def visit(self, expr: Variable):
-        return self.look_up_variable(expr.name, expr)
-
-    def look_up_variable(self, name: Token, expr: Expr):
-        distance = self.locals.get(expr, None)
+        distance = expr.depth
         if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
-        else:
-            return self.globals.get(name)
+            return self.environment.get_at(distance, expr.slot)
+
+        # the site's cached cell is good until a new global is defined
+        globals_ = self.globals
+        if expr.version != globals_.version:
+            expr.cell = globals_.cell(expr.name)
+            expr.version = globals_.version
+        return expr.cell.value
 
     @visitor(Literal)
     def visit(self, expr: Literal):
@@ -232,6 +304,50 @@ class Interpreter:
     def visit(self, expr: Call):
         callee = self.evaluate(expr.callee)
 
+        # Inline cache: the site remembers the declaration (or native) it
+        # called last. Once that has passed the callable and arity checks
+        # below, calling it again with the same number of arguments, which
+        # is fixed per site, can't fail them.
+        target = callee.declaration if type(callee) is LoxFunction else callee
+        if target is expr.target and target is not None:
+            expr.hits += 1
+            arguments = []
+            for argument in expr.arguments:
+                arguments.append(self.evaluate(argument))
+            try:
+                return callee.call(self, arguments)
+            except NativeError as err:
+                raise LoxRuntimeError(expr.paren, str(err)) from None
+            except RecursionError:
+                # Python's stack ran out, report it where the VM would
+                raise LoxRuntimeError(expr.paren, "Stack overflow.") from None
+
+        function, arguments = self.check_call(expr, callee)
+
+        expr.misses += 1
+        expr.target = callee.declaration if type(callee) is LoxFunction else callee
+        try:
+            return function.call(self, arguments)
+        except NativeError as err:
+            raise LoxRuntimeError(expr.paren, str(err)) from None
+        except RecursionError:
+            raise LoxRuntimeError(expr.paren, "Stack overflow.") from None
+
+    def call_native(self, expr: Call, function: LoxCallable, arguments: List[Any]) -> Any:
+        """Call what isn't a LoxFunction, such as a native, for `return f(...)`,
+        where there's no frame for a tail call to take over."""
+        try:
+            return function.call(self, arguments)
+        except NativeError as err:
+            raise LoxRuntimeError(expr.paren, str(err)) from None
+        except RecursionError:
+            raise LoxRuntimeError(expr.paren, "Stack overflow.") from None
+
+    def prepare_call(self, expr: Call) -> Tuple[LoxCallable, List[Any]]:
+        """Evaluate the callee and arguments and check they can be called."""
+        return self.check_call(expr, self.evaluate(expr.callee))
+
+    def check_call(self, expr: Call, callee: Any) -> Tuple[LoxCallable, List[Any]]:
         arguments = []
 
         for argument in expr.arguments:
@@ -244,7 +360,7 @@ class Interpreter:
         if len(arguments) != function.arity():
             raise LoxRuntimeError(expr.paren,
                                   f"Expected {function.arity()} arguments but got {len(arguments)}.")
-        return function.call(self, arguments)
+        return function, arguments
 
     @staticmethod
     def is_truthy(obj: Any) -> bool:
@@ -1,6 +1,11 @@
+import asyncio
+import sys
 import time
-from typing import Any, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Coroutine, Dict, List
 
+from src.common.environment import GlobalEnvironment
 from src.common.lox_callable import LoxCallable
 
 
@@ -14,3 +19,198 @@ class NativeClock(LoxCallable):
 
     def __str__(self):
         return "<native fn>"
+
+
+class NativeExit(LoxCallable):
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        raise EOFError
+
+    def arity(self) -> int:
+        return 0
+
+    def __str__(self):
+        return "<native fn>"
+
+
+class NativeError(Exception):
+    """Raised by a native for bad arguments; the call site reports it as a
+    runtime error at the call's closing paren."""
+
+
+class MemoizedFunction(LoxCallable):
+    """A callable with an LRU cache of its results, keyed on argument values."""
+
+    def __init__(self, function: LoxCallable, max_size: int):
+        self.function = function
+        self.interpreter = None
+        # typed, so true and 1 get separate entries even though they compare equal
+        self.cached = lru_cache(maxsize=max_size, typed=True)(self._call)
+
+    def _call(self, *arguments: Any) -> Any:
+        # a fresh list each time, since LoxFunction.call adopts it as the frame
+        return self.function.call(self.interpreter, list(arguments))
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        self.interpreter = interpreter
+        return self.cached(*arguments)
+
+    def arity(self) -> int:
+        return self.function.arity()
+
+    def stats(self) -> str:
+        info = self.cached.cache_info()
+        calls = info.hits + info.misses
+        rate = info.hits / calls * 100 if calls else 0.0
+        return (f"{self.function}: {info.hits} hits, {info.misses} misses ({rate:.1f}% hit rate), "
+                f"{info.currsize}/{info.maxsize} entries")
+
+    def __str__(self):
+        return str(self.function)
+
+
+class NativeMemoize(LoxCallable):
+    """memoize(fn, size): fn with its results cached, at most `size` of them."""
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        function, size = arguments
+        if not isinstance(function, LoxCallable):
+            raise NativeError("Can only memoize functions.")
+        if not isinstance(size, float) or size < 1 or not size.is_integer():
+            raise NativeError("Cache size must be a positive whole number.")
+
+        return MemoizedFunction(function, int(size))
+
+    def arity(self) -> int:
+        return 2
+
+    def __str__(self):
+        return "<native fn>"
+
+
+class NativeMemoStats(LoxCallable):
+    """memoStats(fn): a memoized function's hit rate and cache size, as a string."""
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        function = arguments[0]
+        if not isinstance(function, MemoizedFunction):
+            raise NativeError("Expected a function returned by memoize.")
+
+        return function.stats()
+
+    def arity(self) -> int:
+        return 1
+
+    def __str__(self):
+        return "<native fn>"
+
+
+def run_coroutine(coroutine: Coroutine, loop: asyncio.AbstractEventLoop | None, timeout: float | None = None) -> Any:
+    """Run an async native's coroutine to completion from the thread running
+    the script, raising TimeoutError if it takes over `timeout` seconds.
+
+    On `loop`, the engine's event loop, only this thread waits. Without one
+    the coroutine gets a loop of its own, on a helper thread if this thread
+    is already running a loop, as when `Lox.run` is called from async code.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    coroutine = asyncio.wait_for(coroutine, timeout)
+    if loop is not None and loop is not running:
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+    if running is None:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        return helper.submit(asyncio.run, coroutine).result()
+
+
+class AsyncNative(LoxCallable):
+    """A native whose work is a coroutine, `run`, awaited by the engine's
+    `wait`. These natives do I/O, so an engine only defines them once
+    `enable_io` has been called, and they refuse to run for an engine that
+    hasn't, as through a function imported from a module.
+    """
+
+    async def run(self, interpreter, arguments: List[Any]) -> Any:
+        raise NotImplementedError
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        if not interpreter.io:
+            raise NativeError("I/O natives aren't enabled.")
+        return interpreter.wait(self.run(interpreter, arguments))
+
+    def __str__(self):
+        return "<native fn>"
+
+
+class NativeSleep(AsyncNative):
+    """sleep(seconds): pause the script."""
+
+    async def run(self, interpreter, arguments: List[Any]) -> Any:
+        seconds = arguments[0]
+        if not isinstance(seconds, float) or seconds < 0:
+            raise NativeError("Sleep time must be a non-negative number.")
+
+        await asyncio.sleep(seconds)
+
+    def arity(self) -> int:
+        return 1
+
+
+class NativeReadFile(AsyncNative):
+    """readFile(path): a file's contents as a string, with relative paths
+    taken from the script's directory like imports."""
+
+    async def run(self, interpreter, arguments: List[Any]) -> Any:
+        name = arguments[0]
+        if not isinstance(name, str):
+            raise NativeError("Path must be a string.")
+
+        path = interpreter.directory / name
+        try:
+            # there's no async file I/O, the loop's default executor does the blocking
+            return await asyncio.get_running_loop().run_in_executor(None, path.read_text)
+        except (OSError, UnicodeDecodeError):
+            raise NativeError(f"Can't read file '{name}'.") from None
+
+    def arity(self) -> int:
+        return 1
+
+
+class NativeReadLine(AsyncNative):
+    """readLine(): the next line of the session's input, standard input by
+    default, without its newline, or nil at the end of input."""
+
+    async def run(self, interpreter, arguments: List[Any]) -> Any:
+        session = interpreter.session
+        stream = session.input if session.input is not None else sys.stdin
+        line = await asyncio.get_running_loop().run_in_executor(None, stream.readline)
+        return line.removesuffix("\n") if line else None
+
+    def arity(self) -> int:
+        return 0
+
+
+IO_NATIVES = {
+    "sleep": NativeSleep,
+    "readFile": NativeReadFile,
+    "readLine": NativeReadLine,
+}
+
+NATIVES = {
+    "clock": NativeClock,
+    "exit": NativeExit,
+    "memoize": NativeMemoize,
+    "memoStats": NativeMemoStats,
+}
+
+
+def define_natives(globals_: GlobalEnvironment | Dict[str, Any], io: bool = False):
+    """Define the natives every engine has in `globals_`, the VM's being a
+    plain dict, and the I/O ones too if `io`."""
+    define = globals_.__setitem__ if isinstance(globals_, dict) else globals_.define
+    for name, native in (NATIVES | IO_NATIVES if io else NATIVES).items():
+        define(name, native())
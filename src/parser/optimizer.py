@@ -0,0 +1,202 @@
+from typing import Any, List
+
+from src.asts.syntax_trees import (Literal, Grouping, Expr, Unary, Binary,
+                                   Expression, Print, Stmt, Var, Variable,
+                                   Assign, Block, If, Logical, While, Call, Function, Return, Import)
+from src.common.visitor import visitor
+from src.lexer.token_type import TokenType
+from src.parser.interpreter import Interpreter
+
+_NUMERIC = {
+    TokenType.GREATER: lambda a, b: a > b,
+    TokenType.GREATER_EQUAL: lambda a, b: a >= b,
+    TokenType.LESS: lambda a, b: a < b,
+    TokenType.LESS_EQUAL: lambda a, b: a <= b,
+    TokenType.MINUS: lambda a, b: a - b,
+    TokenType.STAR: lambda a, b: a * b,
+    TokenType.SLASH: lambda a, b: a / b,
+}
+
+
+class Optimizer:
+    """AST to AST pass run on resolved statements (-O1).
+
+    Folds constant arithmetic and comparisons, drops Grouping nodes,
+    short-circuits Logical nodes with a literal left operand and removes
+    If/While branches whose condition is a literal. Anything that would
+    raise at runtime, such as a division by zero or mismatched operand
+    types, is left in place so the error is reported exactly as before.
+
+    Scopes are never added or removed, so the resolver's depths and slots
+    stay valid.
+    """
+
+    def optimize(self, statements: List[Stmt]) -> List[Stmt]:
+        optimized = []
+        for stmt in statements:
+            stmt = self.optimize_node(stmt)
+            if stmt is not None:
+                optimized.append(stmt)
+
+        return optimized
+
+    def optimize_node(self, node: Stmt | Expr | None):
+        if node is None:
+            return None
+        # noinspection PyTypeChecker
+        return self.visit(node)
+
+    def optimize_branch(self, stmt: Stmt | None) -> Stmt:
+        """Optimize a statement that must stay a statement, e.g. a loop body."""
+        optimized = self.optimize_node(stmt)
+        if optimized is not None:
+            return optimized
+        # keeps the lines of what it replaced, for errors and profiles
+        return Block([], span=stmt.span if stmt is not None else None)
+
+    @visitor(Block)
+    def visit(self, stmt: Block):
+        stmt.statements = self.optimize(stmt.statements)
+        return stmt
+
+    @visitor(Function)
+    def visit(self, stmt: Function):
+        stmt.body = self.optimize(stmt.body)
+        return stmt
+
+    @visitor(Expression)
+    def visit(self, stmt: Expression):
+        stmt.expression = self.optimize_node(stmt.expression)
+        return stmt
+
+    @visitor(Print)
+    def visit(self, stmt: Print):
+        stmt.expression = self.optimize_node(stmt.expression)
+        return stmt
+
+    @visitor(Return)
+    def visit(self, stmt: Return):
+        stmt.value = self.optimize_node(stmt.value)
+        return stmt
+
+    @visitor(Import)
+    def visit(self, stmt: Import):
+        return stmt
+
+    @visitor(Var)
+    def visit(self, stmt: Var):
+        stmt.initializer = self.optimize_node(stmt.initializer)
+        return stmt
+
+    @visitor(If)
+    def visit(self, stmt: If):
+        stmt.condition = self.optimize_node(stmt.condition)
+
+        if isinstance(stmt.condition, Literal):
+            if Interpreter.is_truthy(stmt.condition.value):
+                return self.optimize_node(stmt.then_branch)
+            return self.optimize_node(stmt.else_branch)
+
+        stmt.then_branch = self.optimize_branch(stmt.then_branch)
+        stmt.else_branch = self.optimize_node(stmt.else_branch)
+        return stmt
+
+    @visitor(While)
+    def visit(self, stmt: While):
+        stmt.condition = self.optimize_node(stmt.condition)
+
+        if isinstance(stmt.condition, Literal) and not Interpreter.is_truthy(stmt.condition.value):
+            return None
+
+        stmt.body = self.optimize_branch(stmt.body)
+        return stmt
+
+    @visitor(Assign)
+    def visit(self, expr: Assign):
+        expr.value = self.optimize_node(expr.value)
+        return expr
+
+    @visitor(Variable)
+    def visit(self, expr: Variable):
+        return expr
+
+    @visitor(Literal)
+    def visit(self, expr: Literal):
+        return expr
+
+    @visitor(Grouping)
+    def visit(self, expr: Grouping):
+        return self.optimize_node(expr.expression)
+
+    @visitor(Call)
+    def visit(self, expr: Call):
+        expr.callee = self.optimize_node(expr.callee)
+        expr.arguments = [self.optimize_node(argument) for argument in expr.arguments]
+        return expr
+
+    @visitor(Logical)
+    def visit(self, expr: Logical):
+        expr.left = self.optimize_node(expr.left)
+        expr.right = self.optimize_node(expr.right)
+
+        if not isinstance(expr.left, Literal):
+            return expr
+
+        left_truthy = Interpreter.is_truthy(expr.left.value)
+        if expr.operator.type == TokenType.OR:
+            return expr.left if left_truthy else expr.right
+
+        return expr.right if left_truthy else expr.left
+
+    @visitor(Unary)
+    def visit(self, expr: Unary):
+        expr.right = self.optimize_node(expr.right)
+
+        if not isinstance(expr.right, Literal):
+            return expr
+
+        value = expr.right.value
+        if expr.operator.type == TokenType.BANG:
+            return Literal(not Interpreter.is_truthy(value))
+        if expr.operator.type == TokenType.MINUS and isinstance(value, float):
+            return Literal(-value)
+
+        return expr
+
+    @visitor(Binary)
+    def visit(self, expr: Binary):
+        expr.left = self.optimize_node(expr.left)
+        expr.right = self.optimize_node(expr.right)
+
+        if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+            folded = self.fold(expr.operator.type, expr.left.value, expr.right.value)
+            if folded is not _UNFOLDABLE:
+                return Literal(folded)
+
+        return expr
+
+    @staticmethod
+    def fold(operator: TokenType, left: Any, right: Any) -> Any:
+        """Evaluate a binary operator like the interpreter would, or return
+        _UNFOLDABLE where the interpreter would raise."""
+        match operator:
+            case TokenType.EQUAL_EQUAL:
+                return Interpreter.is_equal(left, right)
+
+            case TokenType.BANG_EQUAL:
+                return not Interpreter.is_equal(left, right)
+
+            case TokenType.PLUS:
+                if (isinstance(left, float) and isinstance(right, float)) or \
+                        (isinstance(left, str) and isinstance(right, str)):
+                    return left + right
+
+            case operator if operator in _NUMERIC:
+                if isinstance(left, float) and isinstance(right, float) and \
+                        not (operator == TokenType.SLASH and right == 0):
+                    return _NUMERIC[operator](left, right)
+
+        return _UNFOLDABLE
+
+
+_UNFOLDABLE = object()
@@ -1,18 +1,26 @@
-from typing import List, Set
+from typing import Iterable, List, Set
 
 from src.asts.syntax_trees import (Expr, Binary, Unary, Literal, Grouping,
                                    Stmt, Print, Expression, Var, Variable,
-                                   Assign, Block, If, Logical, While, Call, Function, Return)
-from src.error_handler import parsing_error, ParseError
+                                   Assign, Block, If, Logical, While, Call, Function, Return, Import)
+from src.error_handler import ParseError, Session
 from src.lexer.token import Token
 from src.lexer.token_type import TokenType as Tt
 
 
 class Parser:
+    """Recursive descent parser over a stream of tokens.
 
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.current = 0
+    The grammar needs one token of lookahead and one of lookback, so only
+    that window is kept: tokens are pulled from the iterable on demand
+    and a scanner's `iter_tokens` can feed the parser while it is reading.
+    """
+
+    def __init__(self, tokens: Iterable[Token], session: Session | None = None):
+        self.tokens = iter(tokens)
+        self.session = session if session is not None else Session()
+        self._previous: Token | None = None
+        self._current: Token = next(self.tokens)
 
     def parse(self) -> List[Stmt]:
 
@@ -24,11 +32,14 @@ class Parser:
         return statements
 
     def declaration(self) -> Stmt | None:
+        first_line = self.peek().line
         try:
             if self.match({Tt.VAR}):
-                return self.var_declaration()
+                return self.spanned(self.var_declaration(), first_line)
             if self.match({Tt.FUN}):
-                return self.function("function")
+                return self.spanned(self.function("function"), first_line)
+            if self.match({Tt.IMPORT}):
+                return self.spanned(self.import_declaration(), first_line)
             return self.statement()
         except ParseError:
             self.synchronize()
@@ -45,23 +56,39 @@ class Parser:
         self.consume(Tt.SEMICOLON, "Expect ';' after variable declaration.")
         return Var(name, initializer)
 
+    def import_declaration(self) -> Import:
+        keyword: Token = self.previous()
+        path: Token = self.consume(Tt.STRING, "Expect module path after 'import'.")
+        self.consume(Tt.SEMICOLON, "Expect ';' after module path.")
+        return Import(keyword, path)
+
     def statement(self) -> Stmt:
+        first_line = self.peek().line
+
         if self.match({Tt.PRINT}):
-            return self.print_statement()
+            stmt = self.print_statement()
         elif self.match({Tt.LEFT_BRACE}):
-            return Block(self.block())
+            stmt = Block(self.block())
         elif self.match({Tt.IF}):
-            return self.if_statement()
+            stmt = self.if_statement()
         elif self.match({Tt.WHILE}):
-            return self.while_statement()
+            stmt = self.while_statement()
         elif self.match({Tt.FOR}):
-            return self.for_statement()
+            stmt = self.for_statement()
         elif self.match({Tt.RETURN}):
-            return self.return_statement()
+            stmt = self.return_statement()
+        else:
+            stmt = self.expression_statement()
+
+        return self.spanned(stmt, first_line)
 
-        return self.expression_statement()
+    def spanned(self, stmt: Stmt, first_line: int) -> Stmt:
+        """Record the lines a statement was parsed from."""
+        stmt.span = (first_line, self.previous().line)
+        return stmt
 
     def for_statement(self) -> Stmt:
+        first_line = self.previous().line
         self.consume(Tt.LEFT_PAREN, "Expect '(' after 'for'.")
 
         if self.match({Tt.SEMICOLON}):
@@ -84,18 +111,22 @@ class Parser:
         self.consume(Tt.RIGHT_PAREN, "Expect ')' after for clauses.")
 
         body: Stmt = self.statement()
+        # the statements the loop is desugared into all take its lines, so
+        # errors and profiles point at the `for`
+        span = (first_line, self.previous().line)
 
         if increment is not None:
-            body = Block([body, Expression(increment)])
+            body = Block([body, Expression(increment, span=span)], span=span)
 
         if condition is None:
             # TODO: Maybe change this to False, infinite
             #  loop without a "break" statement implemented is risky
             condition = Literal(True)
 
-        body = While(condition, body)
+        body = While(condition, body, span=span)
 
         if initializer is not None:
+            initializer.span = span
             body = Block([initializer, body])
 
         return body
@@ -336,21 +367,21 @@ class Parser:
 
     def advance(self) -> Token:
         if not self.is_at_end():
-            self.current += 1
-        return self.previous()
+            self._previous = self._current
+            self._current = next(self.tokens)
+        return self._previous
 
     def is_at_end(self) -> bool:
         return self.peek().type == Tt.EOF
 
     def peek(self) -> Token:
-        return self.tokens[self.current]
+        return self._current
 
     def previous(self) -> Token:
-        return self.tokens[self.current - 1]
+        return self._previous
 
-    @staticmethod
-    def error(token: Token, message: str) -> ParseError:
-        parsing_error(token, message)
+    def error(self, token: Token, message: str) -> ParseError:
+        self.session.parsing_error(token, message)
         return ParseError()
 
     def synchronize(self):
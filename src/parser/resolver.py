@@ -1,13 +1,11 @@
 from enum import Enum, auto
 from typing import List
-from collections import defaultdict
 
 from src.asts.syntax_trees import Block, Stmt, Expr, Var, Variable, Assign, Function, Print, Return, While, Binary, \
-    Call, Grouping, Literal, Logical, Unary, Expression, If
+    Call, Grouping, Literal, Logical, Unary, Expression, If, Import
 from src.common.visitor import visitor
-from src.error_handler import resolution_error
+from src.error_handler import Session
 from src.lexer.token import Token
-from src.parser.interpreter import Interpreter
 
 
 class FunctionType(Enum):
@@ -17,10 +15,17 @@ class FunctionType(Enum):
 
 class Resolver:
 
-    def __init__(self, interpreter: Interpreter):
-        self.interpreter = interpreter
+    """Static pass recording each local's scope distance and slot on the
+    AST itself, so a resolved tree can be cached and run by any engine."""
+
+    def __init__(self, session: Session | None = None):
+        self.session = session if session is not None else Session()
         self.scopes = []
+        # slot index of every local, parallel to scopes
+        self.slots = []
         self.current_function = FunctionType.NONE
+        # scopes opened so far, for metrics
+        self.scope_count = 0
 
     def resolve(self, stmt_expr: Stmt | Expr | List[Stmt]):
         if isinstance(stmt_expr, Stmt) or isinstance(stmt_expr, Expr):
@@ -34,21 +39,29 @@ class Resolver:
             self.resolve(statement)
 
     def begin_scope(self):
-        self.scopes.append(defaultdict(bool))
+        self.scopes.append(dict())
+        self.slots.append(dict())
+        self.scope_count += 1
 
-    def end_scope(self):
+    def end_scope(self) -> int:
+        """Pop the innermost scope and return the number of slots it used."""
         self.scopes.pop()
+        return len(self.slots.pop())
 
-    def declare(self, name: Token):
+    def declare(self, name: Token) -> int | None:
         if not self.scopes:
-            return
+            return None
 
         scope = self.scopes[-1]
+        slots = self.slots[-1]
 
         if name.lexeme in scope:
-            resolution_error(name, "Already a variable with this name in this scope.")
+            self.session.resolution_error(name, "Already a variable with this name in this scope.")
+        else:
+            slots[name.lexeme] = len(slots)
 
         scope[name.lexeme] = False
+        return slots[name.lexeme]
 
     def define(self, name: Token):
         if not self.scopes:
@@ -57,11 +70,12 @@ class Resolver:
         scope = self.scopes[-1]
         scope[name.lexeme] = True
 
-    def resolve_local(self, expr: Expr, name: Token):
+    def resolve_local(self, expr: Variable | Assign, name: Token):
         i = len(self.scopes) - 1
         while i >= 0:
             if name.lexeme in self.scopes[i]:
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
+                expr.depth = len(self.scopes) - 1 - i
+                expr.slot = self.slots[i][name.lexeme]
                 return
             i -= 1
 
@@ -73,14 +87,14 @@ class Resolver:
             self.declare(param)
             self.define(param)
         self.resolve(function.body)
-        self.end_scope()
+        function.size = self.end_scope()
         self.current_function = enclosing_function
 
     @visitor(Block)
     def visit(self, stmt: Block):
         self.begin_scope()
         self.resolve_stmts(stmt.statements)
-        self.end_scope()
+        stmt.size = self.end_scope()
         return None
 
     @visitor(Expression)
@@ -92,13 +106,13 @@ class Resolver:
     def visit(self, stmt: If):
         self.resolve(stmt.condition)
         self.resolve(stmt.then_branch)
-        if stmt.then_branch is not None:
+        if stmt.else_branch is not None:
             self.resolve(stmt.else_branch)
         return None
 
     @visitor(Var)
     def visit(self, stmt: Var):
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
         if stmt.initializer is not None:
             self.resolve(stmt.initializer)
         self.define(stmt.name)
@@ -106,8 +120,8 @@ class Resolver:
 
     @visitor(Variable)
     def visit(self, expr: Variable):
-        if self.scopes and not self.scopes[-1][expr.name.lexeme]:
-            resolution_error(expr.name, "Can't read local variable in its own initializer.")
+        if self.scopes and self.scopes[-1].get(expr.name.lexeme) is False:
+            self.session.resolution_error(expr.name, "Can't read local variable in its own initializer.")
 
         self.resolve_local(expr, expr.name)
         return None
@@ -120,7 +134,7 @@ class Resolver:
 
     @visitor(Function)
     def visit(self, stmt: Function):
-        self.declare(stmt.name)
+        stmt.slot = self.declare(stmt.name)
         self.define(stmt.name)
         self.resolve_function(stmt, FunctionType.FUNCTION)
         return None
@@ -130,11 +144,18 @@ class Resolver:
         self.resolve(stmt.expression)
         return None
 
+    @visitor(Import)
+    def visit(self, stmt: Import):
+        # imported names are globals, so only the top level can import
+        if self.scopes:
+            self.session.resolution_error(stmt.keyword, "Can only import at the top level.")
+        return None
+
     @visitor(Return)
     def visit(self, stmt: Return):
 
         if self.current_function is FunctionType.NONE:
-            resolution_error(stmt.keyword, "Can't return from top-level code.")
+            self.session.resolution_error(stmt.keyword, "Can't return from top-level code.")
 
         if stmt.value is not None:
             self.resolve(stmt.value)
@@ -0,0 +1,241 @@
+"""Profilers for the tree walker (`pylox --profile[=FILE] [--sample]`).
+
+The deterministic profiler, `ProfilingInterpreter`, overrides `execute`,
+`visit(Call)`, `call_native` and `run_body`, so the plain `Interpreter`
+pays nothing for it. It records
+
+  * per function: calls, inclusive and exclusive time,
+  * per source line: how many statements starting there were executed,
+  * per call stack: exclusive time, written in the collapsed format that
+    flamegraph.pl, speedscope and inferno read.
+
+Functions are named by their declaration and natives by the name they were
+called through. A tail call replaces its caller's frame, as it does at
+runtime, so it shows up as a call made by the caller's caller.
+
+With `--sample`, a `SamplingProfiler` instead looks at the Python stack of
+a plain `Interpreter` every millisecond or so, from a thread of its own,
+and finds the Lox functions on it from their `run_body` frames and the
+line from the innermost `execute`. That costs far less than tracing every
+call but only estimates the times, from the samples that landed in each
+function, and doesn't count calls. Time in natives goes to the function
+that called them.
+"""
+import sys
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter_ns
+from types import FrameType
+from typing import Any, Dict, List, Set, TextIO
+
+from src.asts.syntax_trees import Call, Stmt, Variable
+from src.common.lox_callable import LoxCallable
+from src.common.lox_function import LoxFunction
+from src.common.visitor import visitor
+from src.error_handler import LoxRuntimeError, Session
+from src.parser.interpreter import Interpreter
+
+ROOT = "<script>"
+
+
+class FunctionStats:
+
+    __slots__ = ("calls", "inclusive", "exclusive")
+
+    def __init__(self):
+        self.calls = 0
+        # nanoseconds
+        self.inclusive = 0
+        self.exclusive = 0
+
+
+class Frame:
+
+    __slots__ = ("name", "path", "start", "children")
+
+    def __init__(self, name: str, path: str, start: int):
+        self.name = name
+        self.path = path
+        self.start = start
+        self.children = 0
+
+
+class ProfilingInterpreter(Interpreter):
+
+    def __init__(self, session: Session | None = None):
+        super().__init__(session)
+        self.functions: Dict[str, FunctionStats] = defaultdict(FunctionStats)
+        self.line_hits: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.frames: List[Frame] = []
+        # how many frames of each function are live, so recursion only
+        # counts towards the outermost frame's inclusive time
+        self.active: Counter = Counter()
+
+    def interpret(self, statements: List[Stmt]):
+        self.enter(ROOT)
+        try:
+            super().interpret(statements)
+        finally:
+            self.leave()
+
+    def execute(self, stmt: Stmt):
+        if stmt.span is not None:
+            self.line_hits[stmt.span[0]] += 1
+        # noinspection PyTypeChecker
+        return self.visit(stmt)
+
+    def enter(self, name: str):
+        path = self.frames[-1].path + ";" + name if self.frames else name
+        self.frames.append(Frame(name, path, perf_counter_ns()))
+        self.active[name] += 1
+
+    def leave(self):
+        frame = self.frames.pop()
+        elapsed = perf_counter_ns() - frame.start
+        exclusive = elapsed - frame.children
+
+        stats = self.functions[frame.name]
+        stats.calls += 1
+        stats.exclusive += exclusive
+        self.active[frame.name] -= 1
+        if not self.active[frame.name]:
+            stats.inclusive += elapsed
+
+        self.stacks[frame.path] += exclusive
+        if self.frames:
+            self.frames[-1].children += elapsed
+
+    @visitor(Call)
+    def visit(self, expr: Call):
+        callee = self.evaluate(expr.callee)
+        function, arguments = self.check_call(expr, callee)
+
+        if not isinstance(function, LoxFunction):
+            return self.call_native(expr, function, arguments)
+
+        # each body run, tail calls included, is entered in run_body
+        try:
+            return function.call(self, arguments)
+        except RecursionError:
+            raise LoxRuntimeError(expr.paren, "Stack overflow.") from None
+
+    def call_native(self, expr: Call, function: LoxCallable, arguments: List[Any]) -> Any:
+        # `return native(...)` comes here straight from visit(Return)
+        self.enter(expr.callee.name.lexeme if isinstance(expr.callee, Variable) else str(function))
+        try:
+            return super().call_native(expr, function, arguments)
+        finally:
+            self.leave()
+
+    def run_body(self, function: LoxFunction, arguments: List):
+        declaration = function.declaration
+        self.enter(f"{declaration.name.lexeme} (line {declaration.name.line})")
+        try:
+            return super().run_body(function, arguments)
+        finally:
+            self.leave()
+
+    def write_report(self, out: TextIO = sys.stderr, lines: int = 20):
+        """The flat profile: functions by exclusive time, then the hottest lines."""
+        write_report(self.functions, self.line_hits, "calls", "hits", out, lines)
+
+    def write_collapsed(self, out: TextIO):
+        write_collapsed(self.stacks, out)
+
+
+_run_body = Interpreter.run_body.__code__
+_execute = Interpreter.execute.__code__
+
+
+class SamplingProfiler:
+    """Samples the Lox stack of the thread running a tree walker, see
+    `sampling`. Keeps the same tables as `ProfilingInterpreter`, with
+    samples in place of calls and line hits."""
+
+    def __init__(self, interval: float = 0.001):
+        # seconds between samples; in practice at least the GIL's switch
+        # interval, which the times are weighted by the real gaps to allow for
+        self.interval = interval
+        self.functions: Dict[str, FunctionStats] = defaultdict(FunctionStats)
+        self.line_hits: Counter = Counter()
+        self.stacks: Counter = Counter()
+
+    @contextmanager
+    def sampling(self):
+        """Sample the calling thread until the block ends."""
+        target = threading.get_ident()
+        done = threading.Event()
+        sampler = threading.Thread(target=self.run, args=(target, done), name="pylox-sampler", daemon=True)
+        sampler.start()
+        try:
+            yield self
+        finally:
+            done.set()
+            sampler.join()
+
+    def run(self, target: int, done: threading.Event):
+        last = perf_counter_ns()
+        while not done.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            now = perf_counter_ns()
+            if frame is not None:
+                self.sample(frame, now - last)
+            last = now
+
+    def sample(self, frame: FrameType | None, weight: int):
+        names: List[str] = []
+        line = None
+        while frame is not None:
+            code = frame.f_code
+            if code is _run_body:
+                declaration = frame.f_locals["function"].declaration
+                names.append(f"{declaration.name.lexeme} (line {declaration.name.line})")
+            elif code is _execute and line is None:
+                span = frame.f_locals["stmt"].span
+                line = span[0] if span is not None else None
+            frame = frame.f_back
+        names.append(ROOT)
+        names.reverse()
+
+        stats = self.functions[names[-1]]
+        stats.calls += 1
+        stats.exclusive += weight
+        # recursion only counts once towards the inclusive time
+        seen: Set[str] = set()
+        for name in names:
+            if name not in seen:
+                seen.add(name)
+                self.functions[name].inclusive += weight
+        self.stacks[";".join(names)] += weight
+        if line is not None:
+            self.line_hits[line] += 1
+
+    def write_report(self, out: TextIO = sys.stderr, lines: int = 20):
+        """The flat profile, estimated: functions by exclusive time, then the hottest lines."""
+        write_report(self.functions, self.line_hits, "samples", "samples", out, lines)
+
+    def write_collapsed(self, out: TextIO):
+        write_collapsed(self.stacks, out)
+
+
+def write_report(functions: Dict[str, FunctionStats], line_hits: Counter, calls: str, hits: str,
+                 out: TextIO, lines: int):
+    print(f"{'function':<36}{calls:>10}{'incl ms':>12}{'excl ms':>12}{'excl %':>8}", file=out)
+    total = sum(stats.exclusive for stats in functions.values()) or 1
+    ranked = sorted(functions.items(), key=lambda item: item[1].exclusive, reverse=True)
+    for name, stats in ranked:
+        print(f"{name:<36}{stats.calls:>10}{stats.inclusive / 1e6:>12.2f}{stats.exclusive / 1e6:>12.2f}"
+              f"{stats.exclusive / total * 100:>7.1f}%", file=out)
+
+    print(f"\n{'line':<8}{hits:>12}", file=out)
+    for line, count in line_hits.most_common(lines):
+        print(f"{line:<8}{count:>12}", file=out)
+
+
+def write_collapsed(stacks: Counter, out: TextIO):
+    """One `frame;frame;frame weight` line per stack, weights in microseconds."""
+    for path, exclusive in sorted(stacks.items()):
+        if exclusive >= 1000:
+            out.write(f"{path} {exclusive // 1000}\n")
@@ -0,0 +1,136 @@
+"""On-disk cache of parsed and resolved programs.
+
+Entries live in a `__loxcache__` directory next to the script, named by a
+hash of the source text and the interpreter version, so an edit to either
+simply misses. The resolved statement list is pickled and zlib-compressed;
+the resolver records its results on the AST nodes themselves, so a loaded
+program can go straight to `interpret`.
+"""
+import gc
+import hashlib
+import os
+import pickle
+import sys
+import time
+import zlib
+from functools import cache
+from pathlib import Path
+from typing import Any, List
+
+from src.asts.syntax_trees import Stmt
+
+CACHE_DIR_NAME = "__loxcache__"
+SUFFIX = ".loxc"
+MAGIC = b"LOXC\x01"
+
+# modules whose changes invalidate cached programs
+_FRONT_END = (
+    "asts/syntax_trees.py",
+    "lexer/regex_scanner.py",
+    "lexer/scanner.py",
+    "lexer/token.py",
+    "lexer/token_type.py",
+    "parser/rec_des_parser.py",
+    "parser/resolver.py",
+)
+
+
+@cache
+def interpreter_version() -> bytes:
+    """Fingerprint of the Python version and the front end's source code."""
+    digest = hashlib.sha256(sys.version.encode())
+    root = Path(__file__).parent
+    for module in _FRONT_END:
+        digest.update((root / module).read_bytes())
+
+    return digest.digest()
+
+
+def unpickle(data: bytes) -> Any:
+    """`pickle.loads` with the cyclic collector paused. A program's AST is
+    a great many small objects, and the collections their allocation sets
+    off cost several times as much as the unpickling itself."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ProgramCache:
+
+    def __init__(self, directory: Path | str, max_bytes: int = 64 * 1024 * 1024,
+                 max_age: float = 30 * 24 * 60 * 60):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @classmethod
+    def for_script(cls, script_path: Path | str, **kwargs) -> "ProgramCache":
+        return cls(Path(script_path).resolve().parent / CACHE_DIR_NAME, **kwargs)
+
+    @staticmethod
+    def key(source: str) -> str:
+        digest = hashlib.sha256(interpreter_version())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path_for(self, source: str) -> Path:
+        return self.directory / (self.key(source) + SUFFIX)
+
+    def load(self, source: str) -> List[Stmt] | None:
+        path = self.path_for(source)
+        try:
+            data = path.read_bytes()
+            if not data.startswith(MAGIC):
+                return None
+
+            statements = unpickle(zlib.decompress(data[len(MAGIC):]))
+            # bump the mtime so eviction drops the least recently used first
+            os.utime(path)
+            return statements
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def store(self, source: str, statements: List[Stmt]):
+        try:
+            data = MAGIC + zlib.compress(pickle.dumps(statements, pickle.HIGHEST_PROTOCOL))
+        except (RecursionError, pickle.PicklingError):
+            return
+
+        path = self.path_for(source)
+        try:
+            self.directory.mkdir(exist_ok=True)
+            # write then rename, so concurrent readers never see a partial file
+            partial = path.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_bytes(data)
+            partial.replace(path)
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used
+        ones until the directory fits in max_bytes."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*" + SUFFIX):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,168 @@
+"""Batch runner for many independent Lox scripts.
+
+    pylox run-many [--jobs N] [--engine=tree|vm|closure] [--opt-level 0|1] [--no-cache]
+                   [--quiet] [--json FILE] path ...
+
+Directories are searched recursively for `*.lox` files. Scripts are spread
+over a pool of worker processes, each of which imports the interpreter once
+and keeps one `ProgramCache` per script directory, and every script runs in
+a fresh interpreter with its own `Session`. Output is captured per script
+and printed in path order under a `== path` header, followed by a summary
+of exit statuses and timings on stderr. The exit status is 1 if any script
+failed.
+"""
+import argparse
+import json
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Iterable, List
+
+from src.error_handler import Session
+from src.program_cache import ProgramCache
+
+# what each script's status means, as in the single-script CLI
+STATUSES = {
+    0: "ok",
+    65: "compile errors (65)",
+    70: "runtime errors (70)",
+    1: "crashed",
+}
+
+
+@dataclass
+class ScriptResult:
+    path: str
+    status: int
+    output: str
+    errors: str
+    seconds: float
+
+
+# per worker process, see program_cache
+_caches: Dict[Path, ProgramCache] = {}
+
+
+def cache_for(path: Path) -> ProgramCache:
+    directory = path.resolve().parent
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = ProgramCache.for_script(path)
+
+    return cache
+
+
+def run_script(path: str, engine: str, opt_level: int, use_cache: bool) -> ScriptResult:
+    from src.lox import ENGINES, allow_deep_recursion, run
+
+    # once per worker process would do, but it's cheap
+    allow_deep_recursion()
+
+    out, err = StringIO(), StringIO()
+    session = Session(out, err)
+    start = perf_counter()
+    try:
+        source = Path(path).read_text()
+        interpreter = ENGINES[engine](session)
+        interpreter.directory = Path(path).resolve().parent
+        run(source, interpreter, cache_for(Path(path)) if use_cache else None, opt_level)
+        status = 65 if session.had_error else 70 if session.had_runtime_error else 0
+    except EOFError:
+        # the script called exit()
+        status = 0
+    except OSError as error:
+        err.write(f"error: Couldn't read {path}: {error.strerror}\n")
+        status = 1
+    except Exception:
+        err.write(traceback.format_exc())
+        status = 1
+
+    return ScriptResult(path, status, out.getvalue(), err.getvalue(), perf_counter() - start)
+
+
+def find_scripts(paths: Iterable[str]) -> List[str]:
+    scripts = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            scripts.extend(sorted(map(str, path.rglob("*.lox"))))
+        else:
+            scripts.append(str(path))
+
+    return scripts
+
+
+def run_all(scripts: List[str], jobs: int, engine: str, opt_level: int, use_cache: bool) -> Iterable[ScriptResult]:
+    """Results in the order of `scripts`, each yielded as soon as it and all
+    the ones before it are done."""
+    count = len(scripts)
+    engines, levels, caching = [engine] * count, [opt_level] * count, [use_cache] * count
+    if jobs == 1:
+        yield from map(run_script, scripts, engines, levels, caching)
+        return
+
+    # a few chunks per worker, to balance load without a round trip per script
+    chunksize = max(1, count // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(run_script, scripts, engines, levels, caching, chunksize=chunksize)
+
+
+def print_summary(results: List[ScriptResult], wall: float, jobs: int, out=sys.stderr):
+    counts = {status: 0 for status in STATUSES}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+
+    busy = sum(result.seconds for result in results)
+    rows = {
+        "scripts": len(results),
+        "jobs": jobs,
+        **{STATUSES.get(status, f"status {status}"): count for status, count in counts.items()},
+        "wall s": f"{wall:.2f}",
+        "script s (sum)": f"{busy:.2f}",
+        "scripts/sec": f"{len(results) / wall:.1f}" if wall else "n/a",
+    }
+    for name, value in rows.items():
+        print(f"{name:<20}{value:>14}", file=out)
+
+    failed = [result for result in results if result.status != 0]
+    if failed:
+        print("\nFailed:", file=out)
+        for result in failed:
+            print(f"  {result.status:>3}  {result.path}", file=out)
+
+
+def main(args: List[str]) -> int:
+    from src.lox import ENGINES
+
+    arg_parser = argparse.ArgumentParser(prog="pylox run-many", description="Run many Lox scripts in parallel.")
+    arg_parser.add_argument("paths", nargs="+", metavar="path", help="scripts, or directories to search for *.lox")
+    arg_parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1)
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--opt-level", type=int, choices=(0, 1), default=1)
+    arg_parser.add_argument("--no-cache", action="store_true", help="don't use the parsed program cache")
+    arg_parser.add_argument("--quiet", "-q", action="store_true", help="only print the summary")
+    arg_parser.add_argument("--json", metavar="FILE", help="also write every script's result to FILE")
+    options = arg_parser.parse_args(args)
+
+    if options.jobs < 1:
+        arg_parser.error("--jobs must be at least 1")
+
+    scripts = find_scripts(options.paths)
+    results = []
+    start = perf_counter()
+    for result in run_all(scripts, options.jobs, options.engine, options.opt_level, not options.no_cache):
+        results.append(result)
+        if not options.quiet:
+            print(f"== {result.path}")
+            sys.stdout.write(result.output + result.errors)
+    wall = perf_counter() - start
+
+    print_summary(results, wall, options.jobs)
+    if options.json:
+        Path(options.json).write_text(json.dumps([asdict(result) for result in results], indent=2) + "\n")
+
+    return 1 if any(result.status != 0 for result in results) else 0
@@ -0,0 +1,212 @@
+"""A daemon that runs scripts on warm interpreters (`pylox serve`).
+
+    pylox serve [--socket PATH] [--jobs N] [--isolation fresh|shared]
+                [--engine=tree|vm|closure] [--opt-level 0|1] [--timeout S] [--max-steps N] [--io]
+
+Requests arrive over a Unix socket in the protocol described in
+`src.client`, and are run on a pool of `--jobs` interpreters, each created
+ahead of time with its natives defined. The event loop only does I/O;
+scripts run in a thread pool of the same size, so up to `--jobs` of them
+are in progress at once, taking turns on the GIL. The natives `sleep`,
+`readFile` and `readLine` are only defined with `--io`, since they let a
+request reach the host; they are awaited on the event loop, as under
+`src.embed.AsyncLox`, and `readLine` reads the request's `input`, never
+the server's own standard input.
+
+With `--isolation fresh`, the default, every request sees new globals: a
+used interpreter is swapped for a new one once its request is done. That
+goes for the globals of the modules it imports too, since an importer
+shares them, see `src.modules`: each interpreter gets a module cache of
+its own, so a module's top level runs again for every request, though its
+front end is still skipped thanks to the program cache. With `shared`,
+interpreters keep their globals, so a request can see what an earlier one
+on the same interpreter declared, and modules are loaded once per
+process.
+
+A request line longer than MAX_REQUEST_BYTES gets the same status 64
+response as one that isn't valid JSON, and the connection carries on.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, List
+
+from src.client import default_socket
+from src.embed import Lox
+from src.limits import Limits
+from src.modules import ModuleCache
+
+ISOLATION = ("fresh", "shared")
+# longest request line accepted, scripts included
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+MALFORMED = {"status": 64, "output": "", "errors": "error: Malformed request.\n", "seconds": 0.0}
+
+
+class Server:
+
+    def __init__(self, jobs: int, isolation: str, engine: str, opt_level: int, limits: Limits | None,
+                 io: bool = False):
+        self.isolation = isolation
+        self.engine = engine
+        self.opt_level = opt_level
+        self.io = io
+        self.limits = limits
+        self.loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="pylox")
+        self.idle: asyncio.Queue[Lox] = asyncio.Queue()
+        for _ in range(jobs):
+            self.idle.put_nowait(self.new_interpreter())
+
+    def new_interpreter(self) -> Lox:
+        lox = Lox(self.engine, self.opt_level, self.limits, io=self.io)
+        lox.interpreter.loop = self.loop
+        if self.isolation == "fresh":
+            # in place of the engine's process-wide cache
+            lox.interpreter.modules = ModuleCache()
+        return lox
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (line := await read_request(reader)) != b"":
+                response = MALFORMED if line is None else await self.respond(line)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+            source = request["source"]
+            directory = request.get("directory")
+            input = request.get("input", "")
+        except (ValueError, KeyError, TypeError):
+            return MALFORMED
+        if not isinstance(input, str):
+            return MALFORMED
+
+        lox = await self.idle.get()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, execute, lox, source, directory, input)
+        finally:
+            if self.isolation == "fresh":
+                lox = self.new_interpreter()
+            self.idle.put_nowait(lox)
+
+    async def serve(self, path: str):
+        """Serve until SIGINT or SIGTERM."""
+        loop = asyncio.get_running_loop()
+        task = asyncio.current_task()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, task.cancel)
+
+        server = await asyncio.start_unix_server(self.handle, path, limit=MAX_REQUEST_BYTES)
+        print(f"pylox serving on {path}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def read_request(reader: asyncio.StreamReader) -> bytes | None:
+    """The next request line, b"" once the client is done, or None for a line
+    over MAX_REQUEST_BYTES, which is skipped without being held in memory."""
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as error:
+        # the client closed the connection, maybe after a last unterminated line
+        return error.partial
+    except asyncio.LimitOverrunError:
+        pass
+
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as error:
+            # drops what's buffered, up to the newline if it has arrived
+            await reader.readexactly(error.consumed)
+
+
+def execute(lox: Lox, source: str, directory: str | None, input: str) -> Dict[str, Any]:
+    start = perf_counter()
+    try:
+        result = lox.run(source, directory, input)
+        status, output, errors = result.status, result.output, result.errors
+    except Exception:
+        # a bug in the interpreter shouldn't take the server down with it
+        status, output, errors = 1, "", traceback.format_exc()
+
+    return {"status": status, "output": output, "errors": errors, "seconds": perf_counter() - start}
+
+
+def claim_socket(path: str) -> bool:
+    """Remove a stale socket left by a server that died, but not a live one."""
+    if not os.path.exists(path):
+        return True
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+            return True
+
+    return False
+
+
+def main(args: List[str]) -> int:
+    from src.lox import ENGINES
+
+    arg_parser = argparse.ArgumentParser(prog="pylox serve", description="Run Lox scripts sent over a Unix socket.")
+    arg_parser.add_argument("--socket", default=default_socket(), help=f"(default: {default_socket()})")
+    arg_parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                            help="requests run at once, and interpreters kept warm")
+    arg_parser.add_argument("--isolation", choices=ISOLATION, default="fresh",
+                            help="new globals for every request, or globals kept per interpreter")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--opt-level", type=int, choices=(0, 1), default=1)
+    arg_parser.add_argument("--timeout", type=float, help="seconds a request may run (tree engine)")
+    arg_parser.add_argument("--max-steps", type=int, help="statements a request may execute (tree engine)")
+    arg_parser.add_argument("--io", action="store_true", help="define sleep, readFile and readLine")
+    options = arg_parser.parse_args(args)
+
+    if options.jobs < 1:
+        arg_parser.error("--jobs must be at least 1")
+
+    limits = None
+    if options.timeout is not None or options.max_steps is not None:
+        if options.engine != "tree":
+            arg_parser.error("--timeout and --max-steps need the tree engine")
+        limits = Limits(max_steps=options.max_steps, timeout=options.timeout)
+
+    if not claim_socket(options.socket):
+        print(f"error: A server is already listening on {options.socket}.", file=sys.stderr)
+        return 1
+
+    async def serve():
+        server = Server(options.jobs, options.isolation, options.engine, options.opt_level, limits, options.io)
+        await server.serve(options.socket)
+
+    try:
+        asyncio.run(serve())
+    finally:
+        if os.path.exists(options.socket):
+            os.unlink(options.socket)
+
+    return 0
@@ -0,0 +1,63 @@
+import math
+from typing import Any, Dict, List, Tuple
+
+from src.lexer.token import Token
+from src.vm.opcodes import OpCode, OPERAND_COUNT
+
+
+class Chunk:
+    """A flat stream of opcodes and inline operands plus its constant pool.
+
+    `tokens` runs parallel to `code` so that every cell, operands included,
+    can be traced back to the source token it was compiled from.
+    """
+
+    def __init__(self):
+        self.code: List[int] = []
+        self.tokens: List[Token | None] = []
+        self.constants: List[Any] = []
+        self._constant_index: Dict[Tuple, int] = {}
+
+    def write(self, value: int, token: Token | None):
+        self.code.append(int(value))
+        self.tokens.append(token)
+
+    def add_constant(self, value: Any) -> int:
+        # keyed on type too, since 1.0 == True would otherwise share a slot,
+        # and on a float's sign, since 0.0 == -0.0 would
+        if type(value) is float:
+            key = (float, value, math.copysign(1.0, value))
+        else:
+            key = (type(value), value)
+        if key not in self._constant_index:
+            self.constants.append(value)
+            self._constant_index[key] = len(self.constants) - 1
+
+        return self._constant_index[key]
+
+    def disassemble(self, name: str) -> str:
+        lines = [f"== {name} =="]
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            token = self.tokens[offset]
+            line = token.line if token is not None else "-"
+            operands = self.code[offset + 1: offset + 1 + OPERAND_COUNT.get(op, 0)]
+            offset += 1 + len(operands)
+
+            text = f"{offset - 1 - len(operands):04d} {line:>4} {op.name:<16}"
+            if op in (OpCode.CONSTANT, OpCode.GET_GLOBAL, OpCode.SET_GLOBAL,
+                      OpCode.DEFINE_GLOBAL, OpCode.CLOSURE):
+                text += f"{operands[0]:4d} '{self.constants[operands[0]]}'"
+            elif operands:
+                text += f"{operands[0]:4d}"
+
+            if op == OpCode.CLOSURE:
+                for _ in range(self.constants[operands[0]].upvalue_count):
+                    is_local, index = self.code[offset], self.code[offset + 1]
+                    text += f"\n{offset:04d}    |   {'local' if is_local else 'upvalue'} {index}"
+                    offset += 2
+
+            lines.append(text)
+
+        return "\n".join(lines)
@@ -0,0 +1,319 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from src.asts.syntax_trees import (Literal, Grouping, Expr, Unary, Binary,
+                                   Expression, Print, Stmt, Var, Variable,
+                                   Assign, Block, If, Logical, While, Call, Function, Return, Import)
+from src.common.visitor import visitor
+from src.error_handler import LoxRuntimeError
+from src.lexer.token import Token
+from src.lexer.token_type import TokenType
+from src.vm.objects import VMFunction
+from src.vm.opcodes import OpCode
+
+
+BINARY_OPS = {
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.SLASH: OpCode.DIVIDE,
+}
+
+
+@dataclass
+class Local:
+    name: str
+    depth: int
+    is_captured: bool = False
+
+
+@dataclass
+class FunctionState:
+    """Per-function compilation state, chained through `enclosing`."""
+    function: VMFunction
+    enclosing: "FunctionState | None" = None
+    # slot zero holds the callee itself
+    locals: List[Local] = field(default_factory=lambda: [Local("", 0)])
+    upvalues: List[Tuple[int, int]] = field(default_factory=list)
+    scope_depth: int = 0
+
+
+class Compiler:
+    """Compiles a resolved list of statements into a `VMFunction`.
+
+    Top level declarations become globals addressed by name, everything
+    declared inside a block or function lives in a stack slot and is
+    reached from nested functions through upvalues.
+    """
+
+    def __init__(self):
+        self.state: FunctionState | None = None
+        self.token: Token | None = None
+
+    def compile(self, statements: List[Stmt]) -> VMFunction:
+        self.state = FunctionState(VMFunction("script"))
+        for stmt in statements:
+            self.compile_node(stmt)
+
+        self.emit_return()
+        return self.state.function
+
+    def compile_node(self, node: Stmt | Expr):
+        # noinspection PyTypeChecker
+        return self.visit(node)
+
+    @property
+    def chunk(self):
+        return self.state.function.chunk
+
+    def emit(self, *values: int):
+        for value in values:
+            self.chunk.write(value, self.token)
+
+    def emit_constant(self, op: OpCode, value):
+        self.emit(op, self.chunk.add_constant(value))
+
+    def emit_jump(self, op: OpCode) -> int:
+        self.emit(op, -1)
+        return len(self.chunk.code) - 1
+
+    def patch_jump(self, operand: int):
+        self.chunk.code[operand] = len(self.chunk.code)
+
+    def emit_return(self):
+        self.emit(OpCode.NIL, OpCode.RETURN)
+
+    def begin_scope(self):
+        self.state.scope_depth += 1
+
+    def end_scope(self):
+        state = self.state
+        state.scope_depth -= 1
+
+        while state.locals and state.locals[-1].depth > state.scope_depth:
+            if state.locals.pop().is_captured:
+                self.emit(OpCode.CLOSE_UPVALUE)
+            else:
+                self.emit(OpCode.POP)
+
+    def add_local(self, name: Token):
+        self.state.locals.append(Local(name.lexeme, self.state.scope_depth))
+
+    def define_variable(self, name: Token):
+        if self.state.scope_depth > 0:
+            self.add_local(name)
+        else:
+            self.emit_constant(OpCode.DEFINE_GLOBAL, name.lexeme)
+
+    @staticmethod
+    def resolve_local(state: FunctionState, name: Token) -> int | None:
+        for slot in range(len(state.locals) - 1, -1, -1):
+            if state.locals[slot].name == name.lexeme:
+                return slot
+
+        return None
+
+    def resolve_upvalue(self, state: FunctionState, name: Token) -> int | None:
+        if state.enclosing is None:
+            return None
+
+        slot = self.resolve_local(state.enclosing, name)
+        if slot is not None:
+            state.enclosing.locals[slot].is_captured = True
+            return self.add_upvalue(state, 1, slot)
+
+        index = self.resolve_upvalue(state.enclosing, name)
+        if index is not None:
+            return self.add_upvalue(state, 0, index)
+
+        return None
+
+    @staticmethod
+    def add_upvalue(state: FunctionState, is_local: int, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue not in state.upvalues:
+            state.upvalues.append(upvalue)
+            state.function.upvalue_count += 1
+
+        return state.upvalues.index(upvalue)
+
+    def named_variable(self, name: Token, assign: bool):
+        slot = self.resolve_local(self.state, name)
+        if slot is not None:
+            self.emit(OpCode.SET_LOCAL if assign else OpCode.GET_LOCAL, slot)
+            return
+
+        index = self.resolve_upvalue(self.state, name)
+        if index is not None:
+            self.emit(OpCode.SET_UPVALUE if assign else OpCode.GET_UPVALUE, index)
+            return
+
+        self.emit_constant(OpCode.SET_GLOBAL if assign else OpCode.GET_GLOBAL, name.lexeme)
+
+    def function(self, stmt: Function):
+        self.state = FunctionState(VMFunction(stmt.name.lexeme, len(stmt.params)), self.state)
+        self.begin_scope()
+
+        for param in stmt.params:
+            self.add_local(param)
+
+        for body_stmt in stmt.body:
+            self.compile_node(body_stmt)
+
+        self.emit_return()
+
+        state, self.state = self.state, self.state.enclosing
+        self.token = stmt.name
+        self.emit_constant(OpCode.CLOSURE, state.function)
+        for is_local, index in state.upvalues:
+            self.emit(is_local, index)
+
+    @visitor(Return)
+    def visit(self, stmt: Return):
+        self.token = stmt.keyword
+        if stmt.value is not None:
+            self.compile_node(stmt.value)
+        else:
+            self.emit(OpCode.NIL)
+
+        self.emit(OpCode.RETURN)
+
+    @visitor(Function)
+    def visit(self, stmt: Function):
+        self.token = stmt.name
+        # declared up front so the body can refer to itself
+        if self.state.scope_depth > 0:
+            self.add_local(stmt.name)
+            self.function(stmt)
+        else:
+            self.function(stmt)
+            self.define_variable(stmt.name)
+
+    @visitor(Block)
+    def visit(self, stmt: Block):
+        self.begin_scope()
+        for inner in stmt.statements:
+            self.compile_node(inner)
+        self.end_scope()
+
+    @visitor(Expression)
+    def visit(self, stmt: Expression):
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.POP)
+
+    @visitor(If)
+    def visit(self, stmt: If):
+        self.compile_node(stmt.condition)
+        then_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.compile_node(stmt.then_branch)
+        else_jump = self.emit_jump(OpCode.JUMP)
+
+        self.patch_jump(then_jump)
+        self.emit(OpCode.POP)
+        if stmt.else_branch is not None:
+            self.compile_node(stmt.else_branch)
+        self.patch_jump(else_jump)
+
+    @visitor(Print)
+    def visit(self, stmt: Print):
+        self.compile_node(stmt.expression)
+        self.emit(OpCode.PRINT)
+
+    @visitor(Import)
+    def visit(self, stmt: Import):
+        raise LoxRuntimeError(stmt.keyword, "Imports are only supported by the tree and closure engines.")
+
+    @visitor(Var)
+    def visit(self, stmt: Var):
+        self.token = stmt.name
+        if stmt.initializer is not None:
+            self.compile_node(stmt.initializer)
+        else:
+            self.emit(OpCode.NIL)
+
+        self.token = stmt.name
+        self.define_variable(stmt.name)
+
+    @visitor(While)
+    def visit(self, stmt: While):
+        loop_start = len(self.chunk.code)
+        self.compile_node(stmt.condition)
+        exit_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.compile_node(stmt.body)
+        self.emit(OpCode.JUMP, loop_start)
+
+        self.patch_jump(exit_jump)
+        self.emit(OpCode.POP)
+
+    @visitor(Assign)
+    def visit(self, expr: Assign):
+        self.compile_node(expr.value)
+        self.token = expr.name
+        self.named_variable(expr.name, assign=True)
+
+    @visitor(Variable)
+    def visit(self, expr: Variable):
+        self.token = expr.name
+        self.named_variable(expr.name, assign=False)
+
+    @visitor(Literal)
+    def visit(self, expr: Literal):
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit_constant(OpCode.CONSTANT, expr.value)
+
+    @visitor(Logical)
+    def visit(self, expr: Logical):
+        self.compile_node(expr.left)
+
+        if expr.operator.type == TokenType.OR:
+            else_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(else_jump)
+            self.emit(OpCode.POP)
+            self.compile_node(expr.right)
+            self.patch_jump(end_jump)
+        else:
+            end_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            self.emit(OpCode.POP)
+            self.compile_node(expr.right)
+            self.patch_jump(end_jump)
+
+    @visitor(Grouping)
+    def visit(self, expr: Grouping):
+        self.compile_node(expr.expression)
+
+    @visitor(Unary)
+    def visit(self, expr: Unary):
+        self.compile_node(expr.right)
+        self.token = expr.operator
+        self.emit(OpCode.NOT if expr.operator.type == TokenType.BANG else OpCode.NEGATE)
+
+    @visitor(Binary)
+    def visit(self, expr: Binary):
+        self.compile_node(expr.left)
+        self.compile_node(expr.right)
+        self.token = expr.operator
+        self.emit(BINARY_OPS[expr.operator.type])
+
+    @visitor(Call)
+    def visit(self, expr: Call):
+        self.compile_node(expr.callee)
+        for argument in expr.arguments:
+            self.compile_node(argument)
+
+        self.token = expr.paren
+        self.emit(OpCode.CALL, len(expr.arguments))
@@ -0,0 +1,52 @@
+from typing import Any, List
+
+from src.common.lox_callable import LoxCallable
+from src.vm.chunk import Chunk
+
+
+class VMFunction:
+    """A compiled function body: its arity, chunk and upvalue count."""
+
+    def __init__(self, name: str, arity: int = 0):
+        self.name = name
+        self.arity = arity
+        self.chunk = Chunk()
+        self.upvalue_count = 0
+
+    def __str__(self):
+        return f"<fn {self.name}>"
+
+
+class Upvalue:
+    """A captured variable.
+
+    While open it points at a live slot on the VM stack, once the slot
+    goes out of scope the value is copied in and the upvalue is closed.
+    """
+
+    __slots__ = ("slot", "value", "is_open")
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.value: Any = None
+        self.is_open = True
+
+
+class Closure(LoxCallable):
+    """A function with its captured variables. The VM calls these itself;
+    `call` is for natives that take a function, such as memoize."""
+
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: VMFunction, upvalues: List[Upvalue]):
+        self.function = function
+        self.upvalues = upvalues
+
+    def call(self, interpreter, arguments: List[Any]) -> Any:
+        return interpreter.call_closure(self, arguments)
+
+    def arity(self) -> int:
+        return self.function.arity
+
+    def __str__(self):
+        return str(self.function)
@@ -0,0 +1,395 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Coroutine, Dict, List
+
+from src.asts.syntax_trees import Stmt
+from src.common.lox_callable import LoxCallable
+from src.error_handler import LoxRuntimeError, Session
+from src.parser.interpreter import Interpreter
+from src.parser.native_functions import IO_NATIVES, NativeError, define_natives, run_coroutine
+from src.vm.compiler import Compiler
+from src.vm.objects import Closure, Upvalue, VMFunction
+from src.vm.opcodes import OpCode
+
+FRAMES_MAX = 4096
+
+CONSTANT = OpCode.CONSTANT.value
+NIL = OpCode.NIL.value
+TRUE = OpCode.TRUE.value
+FALSE = OpCode.FALSE.value
+POP = OpCode.POP.value
+GET_LOCAL = OpCode.GET_LOCAL.value
+SET_LOCAL = OpCode.SET_LOCAL.value
+GET_UPVALUE = OpCode.GET_UPVALUE.value
+SET_UPVALUE = OpCode.SET_UPVALUE.value
+GET_GLOBAL = OpCode.GET_GLOBAL.value
+SET_GLOBAL = OpCode.SET_GLOBAL.value
+DEFINE_GLOBAL = OpCode.DEFINE_GLOBAL.value
+EQUAL = OpCode.EQUAL.value
+NOT_EQUAL = OpCode.NOT_EQUAL.value
+GREATER = OpCode.GREATER.value
+GREATER_EQUAL = OpCode.GREATER_EQUAL.value
+LESS = OpCode.LESS.value
+LESS_EQUAL = OpCode.LESS_EQUAL.value
+ADD = OpCode.ADD.value
+SUBTRACT = OpCode.SUBTRACT.value
+MULTIPLY = OpCode.MULTIPLY.value
+DIVIDE = OpCode.DIVIDE.value
+NOT = OpCode.NOT.value
+NEGATE = OpCode.NEGATE.value
+PRINT = OpCode.PRINT.value
+JUMP = OpCode.JUMP.value
+JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+CALL = OpCode.CALL.value
+CLOSURE = OpCode.CLOSURE.value
+CLOSE_UPVALUE = OpCode.CLOSE_UPVALUE.value
+RETURN = OpCode.RETURN.value
+
+
+class CallFrame:
+
+    __slots__ = ("closure", "ip", "base")
+
+    def __init__(self, closure: Closure, ip: int, base: int):
+        self.closure = closure
+        self.ip = ip
+        self.base = base
+
+
+class VM:
+    """Stack based virtual machine executing compiled `VMFunction`s.
+
+    Exposes the same `interpret` surface as `Interpreter` so that `src.lox`
+    can drive either engine. The compiler assigns its own stack slots, the
+    resolver's are only used by the tree walker.
+    """
+
+    def __init__(self, session: Session | None = None):
+        self.session = session if session is not None else Session()
+        # set like the other engines', though the VM can't import
+        self.directory = Path.cwd()
+        self.opt_level = 1
+        # the event loop async natives run on, see src.embed.AsyncLox
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # whether scripts may use sleep, readFile and readLine, see enable_io
+        self.io = False
+        self.globals: Dict[str, Any] = {}
+        self.stack: List[Any] = []
+        self.frames: List[CallFrame] = []
+        self.open_upvalues: Dict[int, Upvalue] = {}
+
+        define_natives(self.globals)
+
+    def enable_io(self):
+        """Give the program the natives that sleep and read files and
+        standard input."""
+        self.io = True
+        for name, native in IO_NATIVES.items():
+            self.globals[name] = native()
+
+    def call_closure(self, closure: Closure, arguments: List[Any]) -> Any:
+        """Run `closure` to completion for a native calling back into Lox,
+        as a memoized function does."""
+        if len(self.frames) == FRAMES_MAX:
+            raise NativeError("Stack overflow.")
+
+        floor = len(self.frames)
+        self.frames.append(CallFrame(closure, 0, len(self.stack)))
+        self.stack.append(closure)
+        self.stack.extend(arguments)
+        return self.run(floor)
+
+    def wait(self, coroutine: Coroutine) -> Any:
+        """Run an async native's coroutine, see `AsyncNative`."""
+        return run_coroutine(coroutine, self.loop)
+
+    def interpret(self, statements: List[Stmt]):
+        try:
+            function: VMFunction = Compiler().compile(statements)
+            closure = Closure(function, [])
+            self.stack.append(closure)
+            self.frames.append(CallFrame(closure, 0, 0))
+
+            self.run()
+        except LoxRuntimeError as err:
+            self.session.runtime_error(err)
+        finally:
+            self.stack.clear()
+            self.frames.clear()
+            self.open_upvalues.clear()
+
+    def capture_upvalue(self, slot: int) -> Upvalue:
+        upvalue = self.open_upvalues.get(slot)
+        if upvalue is None:
+            upvalue = self.open_upvalues[slot] = Upvalue(slot)
+
+        return upvalue
+
+    def close_upvalues(self, last: int):
+        for slot in [slot for slot in self.open_upvalues if slot >= last]:
+            upvalue = self.open_upvalues.pop(slot)
+            upvalue.value = self.stack[slot]
+            upvalue.is_open = False
+
+    @staticmethod
+    def error(chunk, ip: int, message: str) -> LoxRuntimeError:
+        # every operand cell shares its opcode's token, so ip - 1 always
+        # lands inside the instruction being executed
+        return LoxRuntimeError(chunk.tokens[ip - 1], message)
+
+    def run(self, floor: int = 0) -> Any:
+        # returns once the frames are back down to `floor`
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        frames = self.frames
+        globals_ = self.globals
+        stringify = Interpreter.stringify
+        out = self.session.out
+
+        frame = frames[-1]
+        chunk = frame.closure.function.chunk
+        code = chunk.code
+        constants = chunk.constants
+        upvalues = frame.closure.upvalues
+        base = frame.base
+        ip = frame.ip
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                push(stack[base + code[ip]])
+                ip += 1
+
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+
+            elif op == GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                try:
+                    push(globals_[name])
+                except KeyError:
+                    raise self.error(chunk, ip, f"Undefined variable '{name}'.")
+
+            elif op == POP:
+                pop()
+
+            elif op == JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+
+            elif op == JUMP:
+                ip = code[ip]
+
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+                if (type(left) is float and type(right) is float) or \
+                        (type(left) is str and type(right) is str):
+                    stack[-1] = left + right
+                else:
+                    raise self.error(chunk, ip, "Operands must be two numbers or two strings.")
+
+            elif op == SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = left - right
+
+            elif op == LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = left < right
+
+            elif op == LESS_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = left <= right
+
+            elif op == GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = left > right
+
+            elif op == GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = left >= right
+
+            elif op == CALL:
+                arg_count = code[ip]
+                ip += 1
+                callee = stack[-1 - arg_count]
+
+                if type(callee) is Closure:
+                    function = callee.function
+                    if arg_count != function.arity:
+                        raise self.error(chunk, ip,
+                                         f"Expected {function.arity} arguments but got {arg_count}.")
+
+                    if code[ip] == RETURN:
+                        # `return f(...)`: this frame is done with, so the
+                        # callee takes it over, as a tail call
+                        if self.open_upvalues:
+                            self.close_upvalues(base)
+                        stack[base:] = stack[len(stack) - arg_count - 1:]
+                        frame.closure = callee
+                    else:
+                        if len(frames) == FRAMES_MAX:
+                            raise self.error(chunk, ip, "Stack overflow.")
+
+                        frame.ip = ip
+                        frame = CallFrame(callee, 0, len(stack) - arg_count - 1)
+                        frames.append(frame)
+                        base = frame.base
+
+                    chunk = function.chunk
+                    code = chunk.code
+                    constants = chunk.constants
+                    upvalues = callee.upvalues
+                    ip = 0
+
+                elif isinstance(callee, LoxCallable):
+                    if arg_count != callee.arity():
+                        raise self.error(chunk, ip,
+                                         f"Expected {callee.arity()} arguments but got {arg_count}.")
+
+                    arguments = stack[len(stack) - arg_count:]
+                    del stack[len(stack) - arg_count - 1:]
+                    try:
+                        push(callee.call(self, arguments))
+                    except NativeError as err:
+                        raise self.error(chunk, ip, str(err)) from None
+                    except RecursionError:
+                        # natives calling back into the VM nest Python calls
+                        raise self.error(chunk, ip, "Stack overflow.") from None
+
+                else:
+                    raise self.error(chunk, ip, "Can only call functions and classes.")
+
+            elif op == RETURN:
+                result = pop()
+                if self.open_upvalues:
+                    self.close_upvalues(base)
+
+                frames.pop()
+                del stack[base:]
+                if len(frames) == floor:
+                    return result
+
+                push(result)
+                frame = frames[-1]
+                chunk = frame.closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                upvalues = frame.closure.upvalues
+                base = frame.base
+                ip = frame.ip
+
+            elif op == SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+
+            elif op == GET_UPVALUE:
+                upvalue = upvalues[code[ip]]
+                ip += 1
+                push(stack[upvalue.slot] if upvalue.is_open else upvalue.value)
+
+            elif op == SET_UPVALUE:
+                upvalue = upvalues[code[ip]]
+                ip += 1
+                if upvalue.is_open:
+                    stack[upvalue.slot] = stack[-1]
+                else:
+                    upvalue.value = stack[-1]
+
+            elif op == SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals_:
+                    raise self.error(chunk, ip, f"Undefined variable '{name}'.")
+                globals_[name] = stack[-1]
+
+            elif op == DEFINE_GLOBAL:
+                globals_[constants[code[ip]]] = pop()
+                ip += 1
+
+            elif op == NIL:
+                push(None)
+
+            elif op == TRUE:
+                push(True)
+
+            elif op == FALSE:
+                push(False)
+
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not stack[-1] == right
+
+            elif op == MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                stack[-1] = left * right
+
+            elif op == DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise self.error(chunk, ip, "Operands must be numbers.")
+                if right == 0:
+                    raise self.error(chunk, ip, "Division by zero is undefined.")
+                stack[-1] = left / right
+
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+
+            elif op == NEGATE:
+                if type(stack[-1]) is not float:
+                    raise self.error(chunk, ip, "Operand must be a number.")
+                stack[-1] = -stack[-1]
+
+            elif op == PRINT:
+                print(stringify(pop()), file=out)
+
+            elif op == CLOSURE:
+                function = constants[code[ip]]
+                ip += 1
+                captured = []
+                for _ in range(function.upvalue_count):
+                    if code[ip]:
+                        captured.append(self.capture_upvalue(base + code[ip + 1]))
+                    else:
+                        captured.append(upvalues[code[ip + 1]])
+                    ip += 2
+                push(Closure(function, captured))
+
+            elif op == CLOSE_UPVALUE:
+                self.close_upvalues(len(stack) - 1)
+                pop()
+
+            else:
+                raise self.error(chunk, ip, f"Unknown opcode {op}.")
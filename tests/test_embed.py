@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from src.embed import AsyncLox, Lox
+from src.limits import Limits
+
+ENGINES = ("tree", "vm", "closure")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_functions_print_to_the_current_run(engine: str):
+    lox = Lox(engine)
+    lox.run('fun greet() { print "hi"; }')
+
+    assert lox.run("greet();").output == "hi\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_runaway_recursion_is_a_runtime_error(engine: str):
+    result = Lox(engine).run("fun f() { return 1 + f(); }\nf();")
+
+    assert (result.errors, result.status) == ("Stack overflow.\n[line 1]\n", 70)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_deep_recursion(engine: str):
+    result = Lox(engine).run("fun f(n) { if (n == 0) return 0; return 1 + f(n - 1); }\nprint f(4000);")
+
+    assert (result.output, result.status) == ("4000\n", 0)
+
+
+@pytest.mark.parametrize("engine", ("tree", "closure"))
+def test_module_functions_print_to_the_importer(engine: str, tmp_path):
+    (tmp_path / "greet.lox").write_text('fun hello(who) { print "hello " + who; return 2; }')
+    program = 'import "greet.lox"; print hello("{}");'
+
+    first, second = Lox(engine), Lox(engine)
+    assert first.run(program.format("a"), tmp_path).output == "hello a\n2\n"
+    assert second.run(program.format("b"), tmp_path).output == "hello b\n2\n"
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_io_natives_are_opt_in(engine: str, tmp_path):
+    (tmp_path / "note.txt").write_text("secret")
+    program = f'print readFile("{tmp_path / "note.txt"}");'
+
+    assert Lox(engine).run(program).errors == "Undefined variable 'readFile'.\n[line 1]\n"
+    assert Lox(engine, io=True).run(program).output == "secret\n"
+
+
+def test_timeout_cuts_sleep_short():
+    result = Lox(limits=Limits(timeout=0.1), io=True).run('sleep(30); print "done";')
+
+    assert (result.output, result.status) == ("", 70)
+    assert result.errors.startswith("Timeout of 0.1 seconds exceeded.")
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_io_natives_run_inside_an_event_loop(engine: str):
+    async def main():
+        return Lox(engine, io=True).run('sleep(0); print "awake";')
+
+    assert asyncio.run(main()).output == "awake\n"
+
+
+def test_async_io_natives_are_opt_in():
+    async def main():
+        async with AsyncLox() as lox:
+            refused = await lox.run("sleep(0);")
+        async with AsyncLox(io=True) as lox:
+            allowed = await lox.run("sleep(0);")
+        return refused, allowed
+
+    refused, allowed = asyncio.run(main())
+    assert refused.errors == "Undefined variable 'sleep'.\n[line 1]\n"
+    assert allowed.status == 0
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_read_line_reads_the_run_input(engine: str):
+    program = "print readLine(); print readLine(); print readLine();"
+
+    assert Lox(engine, io=True).run(program, input="one\ntwo").output == "one\ntwo\nnil\n"
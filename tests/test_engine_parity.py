@@ -0,0 +1,38 @@
+"""Every engine, at every optimization level, must behave like the tree
+walker without the optimizer: the same output, errors and exit status."""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parents[1]
+PROGRAMS = sorted((ROOT / "lox_source").glob("*.lox")) + sorted((ROOT / "tests" / "programs").glob("*.lox"))
+CONFIGS = [(engine, opt_level) for engine in ("tree", "vm", "closure") for opt_level in ("-O0", "-O1")]
+
+
+def pylox(path: Path, engine: str, opt_level: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-m", "src.lox", "--no-cache", f"--engine={engine}", opt_level, str(path)],
+                          cwd=ROOT, capture_output=True, text=True, timeout=120)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    results = {}
+
+    def run(path: Path) -> subprocess.CompletedProcess:
+        if path not in results:
+            results[path] = pylox(path, "tree", "-O0")
+        return results[path]
+
+    return run
+
+
+@pytest.mark.parametrize("engine, opt_level", CONFIGS[1:])
+@pytest.mark.parametrize("path", PROGRAMS, ids=lambda path: path.name)
+def test_matches_tree_walker(reference, path: Path, engine: str, opt_level: str):
+    expected = reference(path)
+    actual = pylox(path, engine, opt_level)
+
+    assert (actual.stdout, actual.stderr, actual.returncode) == \
+           (expected.stdout, expected.stderr, expected.returncode)
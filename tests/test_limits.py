@@ -0,0 +1,41 @@
+from io import StringIO
+
+from src.asts.syntax_trees import Literal, Print
+from src.embed import Lox
+from src.error_handler import Session
+from src.limits import LimitedInterpreter, Limits
+
+
+def test_step_limit():
+    program = 'print 1;\nprint 2;\nprint 3;\nprint 4;\nprint 5;'
+    result = Lox(limits=Limits(max_steps=3)).run(program)
+
+    assert (result.output, result.errors, result.status) == ("1\n2\n3\n", "Step limit of 3 exceeded.\n[line 4]\n", 70)
+
+
+def test_call_depth_limit():
+    program = 'fun f(n) {\n  print n;\n  return 1 + f(n + 1);\n}\nf(1);'
+    result = Lox(limits=Limits(max_call_depth=3)).run(program)
+
+    assert (result.output, result.errors, result.status) == ("1\n2\n3\n", "Stack overflow.\n[line 3]\n", 70)
+
+
+def test_tail_calls_dont_count_towards_the_call_depth():
+    program = 'fun f(n) {\n  if (n == 0) return "done";\n  return f(n - 1);\n}\nprint f(100);'
+
+    assert Lox(limits=Limits(max_call_depth=3)).run(program).output == "done\n"
+
+
+def test_environment_limit():
+    program = 'var i = 0;\nwhile (i < 10) {\n  i = i + 1;\n}'
+    result = Lox(limits=Limits(max_environments=3)).run(program)
+
+    assert (result.errors, result.status) == ("Environment limit of 3 exceeded.\n[line 3]\n", 70)
+
+
+def test_limit_without_a_source_line():
+    session = Session(StringIO(), StringIO())
+    # built by hand, so without the span the parser gives statements
+    LimitedInterpreter(Limits(max_steps=0), session).interpret([Print(Literal(1.0))])
+
+    assert session.err.getvalue() == "Step limit of 0 exceeded.\n"
@@ -0,0 +1,26 @@
+from io import StringIO
+
+from src.error_handler import Session
+from src.lox import run
+from src.parser.interpreter import Interpreter
+from src.profiler import ProfilingInterpreter, SamplingProfiler
+
+FIB = "fun fib(n) {\n  if (n < 2) return n;\n  return fib(n - 1) + fib(n - 2);\n}\n"
+
+
+def test_natives_returned_from_are_profiled():
+    profiler = ProfilingInterpreter(Session(StringIO(), StringIO()))
+    run("fun now() { return clock(); }\nnow();", profiler)
+
+    assert profiler.functions["clock"].calls == 1
+    assert "<script>;now (line 1);clock" in profiler.stacks
+
+
+def test_sampling_finds_the_hot_function():
+    interpreter = Interpreter(Session(StringIO(), StringIO()))
+    profiler = SamplingProfiler()
+    with profiler.sampling():
+        run(FIB + "print fib(20);", interpreter)
+
+    assert profiler.functions["fib (line 1)"].calls > 0
+    assert set(profiler.line_hits) <= {2, 3, 5}
@@ -0,0 +1,26 @@
+import asyncio
+import json
+
+import pytest
+
+from src.server import Server
+
+
+@pytest.mark.parametrize("engine", ("tree", "closure"))
+def test_fresh_isolation_covers_imported_globals(engine: str, tmp_path):
+    (tmp_path / "counter.lox").write_text("var counter = 1; fun get() { return counter; }")
+    program = 'import "counter.lox"; {} print get();'
+
+    async def requests():
+        server = Server(1, "fresh", engine, 1, None)
+        try:
+            first = await server.respond(json.dumps({"source": program.format("counter = 10;"),
+                                                     "directory": str(tmp_path)}).encode())
+            second = await server.respond(json.dumps({"source": program.format(""),
+                                                      "directory": str(tmp_path)}).encode())
+        finally:
+            server.executor.shutdown()
+        return first, second
+
+    first, second = asyncio.run(requests())
+    assert (first["output"], second["output"]) == ("10\n", "1\n")